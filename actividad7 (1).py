@@ -7,212 +7,40 @@ Original file is located at
     https://colab.research.google.com/drive/1m-W-roLWNofWg2zzR8XRIl46Wy678k_A
 """
 
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import statsmodels.api as sm
-from statsmodels.tsa.stattools import adfuller
-from statsmodels.tsa.stattools import acf, pacf
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.vector_ar.vecm import coint_johansen
-import yfinance as yf
 import warnings
 warnings.filterwarnings('ignore')
 
-# Test de Dickey-Fuller Aumentado
-def adf_test(series, title=''):
-    print(f'Augmented Dickey-Fuller Test: {title}')
-    result = adfuller(series.dropna(), autolag='AIC')
-    labels = ['ADF Test Statistic', 'p-value', '# Lags Used', 'Number of Observations Used']
-    out = pd.Series(result[0:4], index=labels)
-    for key, value in result[4].items():
-        out[f'Critical Value ({key})'] = value
-    print(out.to_string())
-    if result[1] <= 0.05:
-        print("→ Serie estacionaria (se rechaza H0)\n")
-    else:
-        print("→ Serie NO estacionaria (no se rechaza H0)\n")
-
-# Aplicar diferenciación hasta volver estacionaria la serie
-def make_stationary(series, max_diff=2):
-    d = 0
-    temp_series = series.copy()
-    while d <= max_diff:
-        result = adfuller(temp_series.dropna(), autolag='AIC')
-        p_value = result[1]
-        if p_value <= 0.05:
-            print(f"✔ Serie estacionaria tras {d} diferenciación(es).")
-            return temp_series, d
-        else:
-            temp_series = temp_series.diff()
-            d += 1
-    print("✘ No se logró estacionar la serie con el número máximo de diferenciaciones.")
-    return temp_series, d
-
-# Medias móviles
-def moving_average(data, window):
-    return data.rolling(window=window).mean()
-
-# Correlograma ACF y PACF
-def plot_correlogram(series, lags=40, title=''):
-    plt.figure(figsize=(14, 5))
-    plt.subplot(121)
-    sm.graphics.tsa.plot_acf(series.dropna(), lags=lags, ax=plt.gca(), title=f'ACF - {title}')
-    plt.subplot(122)
-    sm.graphics.tsa.plot_pacf(series.dropna(), lags=lags, ax=plt.gca(), title=f'PACF - {title}')
-    plt.tight_layout()
-    plt.show()
-
-# Simulación de caminata aleatoria
-def plot_random_walk(stock_data, ticker):
-    stock_diff = stock_data.diff().dropna()
-    step_std = stock_diff.std()
-    np.random.seed(42)
-    n_steps = len(stock_data)
-    steps = np.random.normal(0, step_std, n_steps)
-    random_walk = np.cumsum(steps) + stock_data.iloc[0]
-    df = pd.DataFrame({
-        'Actual': stock_data,
-        'Random Walk': random_walk
-    }, index=stock_data.index)
-    plt.figure(figsize=(14, 7))
-    plt.plot(df['Actual'], label='Actual Adjusted Close Prices', color='black')
-    plt.plot(df['Random Walk'], label='Simulated Random Walk', color='red', linestyle='--')
-    plt.title(f'{ticker} - Actual Prices vs. Simulated Random Walk')
-    plt.xlabel('Date')
-    plt.ylabel('Price')
-    plt.legend()
-    plt.show()
-
-# Test de cointegración de Johansen
-def cointegration_test(df):
-    print("\nJohansen Cointegration Test:")
-    try:
-        result = coint_johansen(df, det_order=0, k_ar_diff=1)
-        print(f"Trace statistic: {result.lr1}")
-        print(f"Critical values (90%, 95%, 99%): {result.cvt}")
-        for i in range(len(result.lr1)):
-            if result.lr1[i] > result.cvt[i, 1]:  # 95%
-                print(f"r = {i}: Existe cointegración (95%)")
-            else:
-                print(f"r = {i}: No hay cointegración (95%)")
-        print("\n")
-    except Exception as e:
-        print(f"Error en el test de Johansen: {e}\n")
-
-
-
-# Ajuste ARIMA sobre serie diferenciada y forecast (con reintegración)
-def fit_arima(series, ticker, order=(1,1,1), forecast_steps=30):
-    try:
-        d = order[1]  # Grado de diferenciación
-        if d > 0:
-            # Diferenciar la serie para volverla estacionaria
-            differenced_series = series.diff(d).dropna()
-        else:
-            differenced_series = series.dropna()
-
-        # Ajustar el modelo sobre la serie diferenciada
-        model = ARIMA(differenced_series, order=(order[0], 0, order[2]))  # d=0 porque ya se aplicó manualmente
-        results = model.fit()
-        print(f'ARIMA Model Summary para {ticker} (diferenciada d={d}):')
-        print(results.summary())
-
-        # Forecast en la serie diferenciada
-        forecast_diff = results.get_forecast(steps=forecast_steps)
-        forecast_mean_diff = forecast_diff.predicted_mean
-
-        # Reintegrar para volver a escala original
-        last_value = series.dropna().iloc[-1]
-        forecast_values = forecast_mean_diff.cumsum() + last_value
-
-        # Crear índice futuro (business days desde el último día)
-        forecast_index = pd.date_range(start=series.index[-1], periods=forecast_steps + 1, freq='B')[1:]
-        forecast_series = pd.Series(forecast_values.values, index=forecast_index)
-
-        # Graficar
-        plt.figure(figsize=(14, 7))
-        plt.plot(series, label='Precio Histórico')
-        plt.plot(forecast_series, label='Pronóstico ARIMA (Reintegrado)', color='red')
-        plt.title(f'{ticker} - ARIMA Forecast con diferenciación (d={d})')
-        plt.xlabel('Fecha')
-        plt.ylabel('Precio')
-        plt.legend()
-        plt.show()
-
-        return results.aic
-    except Exception as e:
-        print(f"Error fitting ARIMA para {ticker}: {e}")
-        return np.inf
+# Las funciones viven en el paquete actividad7 (importable; también `python -m actividad7 --help`).
+# Este script solo fija la configuración del análisis y lo ejecuta.
+from actividad7 import ejecutar
 
 # Descargar datos de Yahoo Finance
 tickers = ['LLY', 'WELL', 'WFC', 'JPM']
 start_date = '2024-09-02'
 end_date = '2025-06-09'
 
-data = yf.download(tickers, start=start_date, end=end_date)
+# Fuente de precios: None = Yahoo Finance; actividad7.fuente_local('precios/') para correr sin red
+fuente = None
 
-# Usar precios ajustados
-data = data['Adj Close'] if 'Adj Close' in data.columns else data['Close']
+# Etapas: None = todas menos el backtest; p.ej. ['adf', 'johansen'] para un análisis parcial
+etapas = None
 
-# Diccionario para almacenar AIC de cada modelo
-aic_scores = {}
+# Modo paralelo: análisis por acción como tabla, repartido en un pool de procesos (None = todos los núcleos)
+modo_paralelo = False
+n_workers = None
 
-# Análisis por acción
-for ticker in tickers:
-    print(f'\n\n=== Análisis para {ticker} ===\n')
+# Elegir (p, q) de cada ARIMA por AIC en lugar de usar siempre (1, d, 1)
+orden_automatico = True
 
-    stock_data = data[ticker]
+# Backtest walk-forward de los pronósticos ARIMA (RMSE/MAE por ticker)
+evaluar_pronosticos = False
 
-    # ADF test original
-    adf_test(stock_data, title=f'{ticker} - Serie original')
-
-    # Simulación de caminata aleatoria
-    plot_random_walk(stock_data, ticker)
-
-    # Volver estacionaria la serie
-    stationary_series, d = make_stationary(stock_data)
-
-    # ADF de serie estacionaria
-    adf_test(stationary_series, title=f'{ticker} - Serie diferenciada')
-
-    # Correlograma
-    plot_correlogram(stationary_series, title=f'{ticker} - Serie estacionaria (d={d})')
-
-    # Medias móviles
-    ma_9 = moving_average(stock_data, 9)
-    ma_30 = moving_average(stock_data, 30)
-
-    plt.figure(figsize=(14, 7))
-    plt.plot(stock_data, label='Precios Ajustados')
-    plt.plot(ma_9, label='Media móvil 9 días')
-    plt.plot(ma_30, label='Media móvil 30 días')
-    plt.title(f'{ticker} - Precios y Medias Móviles')
-    plt.legend()
-    plt.show()
-
-    # Ajustar ARIMA
-    aic_scores[ticker] = fit_arima(stock_data, ticker, order=(1, d, 1))
-
-
-# Test de cointegración
-coint_df = pd.DataFrame({
-    'LLY': data['LLY'],
-    'WELL': data['WELL'],
-    'WFC': data['WFC'],
-    'JPM': data['JPM']
-}).dropna()
-cointegration_test(coint_df)
-
-
-# Comparación final
-print("\n=== Comparación de inversiones ===")
-print("AIC menor = mejor ajuste del modelo ARIMA.\n")
-for ticker, aic in aic_scores.items():
-    print(f"{ticker} → AIC: {aic:.2f}")
-best_stock = min(aic_scores, key=aic_scores.get)
-print(f"\n✔ Recomendación basada en ARIMA: {best_stock}")
-print("Nota: Si hay cointegración, considera estrategia de 'pairs trading'.")
+if __name__ == '__main__':
+    if evaluar_pronosticos:
+        from actividad7.pipeline import ETAPAS_POR_DEFECTO
+        etapas = list(etapas or ETAPAS_POR_DEFECTO) + ['backtest']
+    resultados = ejecutar(tickers, start_date, end_date, etapas=etapas, fuente=fuente, modo_paralelo=modo_paralelo,
+                          n_workers=n_workers, orden_automatico=orden_automatico)
 
 """INTERPRETACIONES DE RESULTADOS AL EVALUAR LAS ACCIONES EN EL CÓDIGO:
 Interpretación de los resultados de raiz unitaria, correlograma (ACF y PACF) , ADF, cointegration , random walk
@@ -317,88 +145,6 @@ El Test de Cointegración de Johansen aplicado a las series muestra que ninguna
 
 """
 
-import pandas as pd
-import yfinance as yf
-from statsmodels.tsa.vector_ar.vecm import coint_johansen
-import itertools
-import warnings
-warnings.filterwarnings('ignore')
-
-# Function to perform Johansen cointegration test for a pair
-def cointegration_test(df, pair_name=''):
-    if df.dropna().empty or len(df.dropna()) < 2:
-        print(f"Johansen Cointegration Test for {pair_name}: Insufficient data to perform test")
-        return
-    print(f"\nJohansen Cointegration Test for {pair_name}:")
-    try:
-        result = coint_johansen(df, det_order=0, k_ar_diff=1)
-        print(f"Trace statistic: {result.lr1}")
-        print(f"Critical values (90%, 95%, 99%): {result.cvt}")
-        cointegrated = False
-        for i in range(len(result.lr1)):
-            if result.lr1[i] > result.cvt[i, 1]:  # 95% critical value
-                print(f"r = {i}: Cointegration exists at 95% confidence level")
-                if i == 0:
-                    cointegrated = True
-            else:
-                print(f"r = {i}: No cointegration at 95% confidence level")
-        print(f"\nInterpretation for {pair_name}:")
-        if cointegrated:
-            print(f"The pair {pair_name} is cointegrated at the 95% confidence level. This suggests a long-term equilibrium relationship, making it suitable for pairs trading strategies, as deviations from the equilibrium are likely to revert.")
-        else:
-            print(f"The pair {pair_name} is not cointegrated at the 95% confidence level. The stocks likely move independently, and pairs trading may not be effective.")
-        print("\n")
-    except Exception as e:
-        print(f"Error in Johansen test for {pair_name}: {e}\n")
-
-# Function to perform pairwise cointegration tests
-def pairwise_cointegration_test(data, tickers):
-    print("\n=== Pairwise Cointegration Tests ===")
-    pairs = list(itertools.combinations(tickers, 2))
-    for ticker1, ticker2 in pairs:
-        # Prepare DataFrame for the pair
-        coint_df = pd.DataFrame({
-            ticker1: data[ticker1],
-            ticker2: data[ticker2]
-        }).dropna()
-        # Run cointegration test for the pair
-        pair_name = f"{ticker1}-{ticker2}"
-        cointegration_test(coint_df, pair_name)
-
-# Load data from Yahoo Finance with retry logic
-tickers = ['LLY', 'WELL', 'WFC', 'JPM']
-start_date = '2024-09-02'
-end_date = '2025-06-09'
-
-def fetch_data(tickers, start_date, end_date, retries=3):
-    for attempt in range(retries):
-        try:
-            data = yf.download(tickers, start=start_date, end=end_date, timeout=10)
-            if data.empty:
-                print("No data retrieved. Retrying...")
-                continue
-            return data
-        except Exception as e:
-            print(f"Attempt {attempt + 1} failed: {e}")
-            if attempt + 1 == retries:
-                print("Max retries reached. Exiting.")
-                return None
-    return None
-
-data = fetch_data(tickers, start_date, end_date)
-if data is None or data.empty:
-    print("Failed to retrieve data. Please check network or try later.")
-    exit()
-
-# Use Adjusted Close prices
-if 'Adj Close' not in data.columns:
-    data = data['Close']
-else:
-    data = data['Adj Close']
-
-# Perform pairwise cointegration tests
-pairwise_cointegration_test(data, tickers)
-
 """##Conclusión Cointegración
 
 Con base en los resultados de los tests de cointegración de Johansen para los pares LLY-WELL, LLY-WFC, LLY-JPM, WELL-WFC, WELL-JPM y WFC-JPM, ninguno muestra evidencia de cointegración al 95% de confianza. En todos los casos, las estadísticas de traza son inferiores a los valores críticos correspondientes, lo que indica que estas acciones no mantienen una relación estable de largo plazo. Por lo tanto, las acciones analizadas tienden a moverse de forma independiente y no sería recomendable aplicar estrategias de pairs trading, ya que no se sustentan en una relación cointegrada. Es probable que sea necesario un periodo de tiempo mas largo, en el cual sea posible identificar comportamiento de integración entre si.
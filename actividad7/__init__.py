@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Actividad7: raíz unitaria, caminatas aleatorias, ARIMA y cointegración de precios de acciones.
+
+Los submódulos se importan al primer uso de cada nombre (PEP 562), de modo que `import actividad7`
+no carga matplotlib, statsmodels ni yfinance: cada etapa paga solo las dependencias que usa.
+
+    import actividad7
+    data = actividad7.fetch_data(['LLY', 'JPM'], '2024-09-02', '2025-06-09')
+    actividad7.cointegration_screen(data['Close'], ['LLY', 'JPM'])
+
+Desde la línea de comandos: python -m actividad7 --help
+"""
+
+import importlib
+
+# Nombre público -> submódulo que lo define
+_EXPORTS = {
+    'salidas': ['HEADLESS', 'GUARDAR_FIGURAS', 'OUTPUT_DIR', 'configurar', 'graficar', 'guardar_resultado'],
+    'perfil': ['activar_perfilado', 'desactivar_perfilado', 'perfilado_activo', 'perfil_ticker', 'instrumentar',
+               'resumen_perfil', 'exportar_perfil'],
+    'datos': ['CACHE_DIR', 'leer_cache', 'guardar_cache', 'rangos_faltantes', 'fuente_yahoo', 'fuente_local',
+              'descarga_incremental', 'fetch_data', 'fetch_panel'],
+    'descarga': ['LimiteTasa', 'DescargaMasiva', 'fuente_http', 'NO_EXISTE'],
+    'panel': ['PanelPrecios', 'ConstructorPanel', 'campo_precio', 'valores_completos'],
+    'cache_resultados': ['configurar_cache', 'cache_activa', 'limpiar_cache'],
+    'estacionariedad': ['adf_test', 'make_stationary', 'adf_lote', 'huella_adf', 'orden_diferenciacion',
+                        'tabla_adf'],
+    'correlograma': ['correlograma_lote', 'correlograma_ticker', 'tabla_correlograma', 'tabla_rezagos'],
+    'indicadores': ['moving_average', 'IndicadoresMoviles', 'indicadores_panel'],
+    'simulacion': ['simular_caminatas', 'montecarlo_panel'],
+    'graficos': ['mostrar_figura', 'esperar_figuras', 'plot_correlogram', 'plot_random_walk', 'plot_moving_averages',
+                 'plot_forecast', 'graficar_ticker'],
+    'arima': ['ajustar_arima', 'buscar_orden_arima', 'fit_arima', 'backtest_arima'],
+    'analisis': ['analizar_ticker', 'analisis_paralelo', 'backtest_panel', 'guardar_resultados_analisis'],
+    'cointegracion': ['johansen_resultado', 'cointegration_test', 'pairwise_cointegration_test',
+                      'cointegration_screen'],
+    'pipeline': ['ETAPAS', 'ejecutar'],
+}
+_MODULO_DE = {nombre: modulo for modulo, nombres in _EXPORTS.items() for nombre in nombres}
+
+__all__ = sorted(_MODULO_DE)
+
+
+def __getattr__(nombre):
+    if nombre in _MODULO_DE:
+        return getattr(importlib.import_module(f'.{_MODULO_DE[nombre]}', __name__), nombre)
+    if nombre in _EXPORTS:
+        return importlib.import_module(f'.{nombre}', __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_EXPORTS))
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Análisis estructurado por ticker (ADF, medias móviles, ARIMA), en serie o en un pool de procesos."""
+
+import numpy as np
+import pandas as pd
+
+from .perfil import instrumentar
+from .salidas import guardar_resultado
+from .estacionariedad import adf_test, make_stationary, adf_lote
+from .indicadores import moving_average
+from .arima import ajustar_arima, buscar_orden_arima, _pronostico_reintegrado, backtest_arima
+from .paralelo import _pool_con_panel, panel_worker
+
+# Análisis completo de un ticker sin gráficas: ADF, diferenciación, medias móviles y ARIMA
+def analizar_ticker(stock_data, ticker, forecast_steps=30, adf_results=None, auto_orden=False):
+    if adf_results is None:
+        adf_results = adf_lote(stock_data.to_frame(ticker))[ticker]
+    original = adf_test(stock_data, verbose=False, result=adf_results.get(0))
+    stationary_series, d = make_stationary(stock_data, verbose=False, adf_results=adf_results)
+    diferenciada = adf_test(stationary_series, verbose=False, result=adf_results.get(d))
+    res = {
+        'ticker': ticker,
+        'adf_stat': original[0],
+        'adf_pvalue': original[1],
+        'adf_lags': original[2],
+        'd': d,
+        'adf_stat_diff': diferenciada[0],
+        'adf_pvalue_diff': diferenciada[1],
+        'ma_9': moving_average(stock_data, 9).iloc[-1],
+        'ma_30': moving_average(stock_data, 30).iloc[-1],
+    }
+    try:
+        if auto_orden:
+            order, results, _ = buscar_orden_arima(stock_data, d)
+            forecast_series = _pronostico_reintegrado(stock_data, results, forecast_steps)
+        else:
+            order = (1, d, 1)
+            results, forecast_series = ajustar_arima(stock_data, order=order, forecast_steps=forecast_steps)
+        res['order'] = order
+        res['aic'] = results.aic
+        res['bic'] = results.bic
+        res['params'] = dict(zip(results.param_names, np.asarray(results.params)))
+        res['pvalues'] = dict(zip(results.param_names, np.asarray(results.pvalues)))
+        res['forecast'] = forecast_series
+    except Exception as e:
+        res['order'] = None
+        res['aic'] = np.inf
+        res['bic'] = np.inf
+        res['params'] = None
+        res['pvalues'] = None
+        res['forecast'] = None
+        res['error'] = str(e)
+    return res
+
+def _analizar_en_worker(ticker, forecast_steps, adf_results, auto_orden):
+    return analizar_ticker(panel_worker()[ticker], ticker, forecast_steps, adf_results, auto_orden)
+
+# Análisis de todos los tickers en paralelo con un pool de procesos.
+# El panel se copia una sola vez a memoria compartida; cada tarea solo recibe el nombre del ticker.
+# Devuelve una tabla con una fila por ticker, en el mismo orden que `tickers`.
+# `adf_results` ({ticker: {d: resultado}}, como adf_lote) evita recalcular ADF ya hechos.
+@instrumentar()
+def analisis_paralelo(data, tickers, n_workers=None, forecast_steps=30, auto_orden=False, adf_results=None):
+    panel = data[list(tickers)]
+    # Los ADF de todo el panel se calculan en lote aquí y viajan con cada tarea (son pocas cifras)
+    adf = adf_results if adf_results is not None else adf_lote(panel)
+    if n_workers == 1:
+        filas = [analizar_ticker(panel[ticker], ticker, forecast_steps, adf[ticker], auto_orden) for ticker in tickers]
+    else:
+        with _pool_con_panel(panel, n_workers) as executor:
+            filas = list(executor.map(_analizar_en_worker, tickers, [forecast_steps] * len(tickers),
+                                      [adf[ticker] for ticker in tickers], [auto_orden] * len(tickers)))
+    return pd.DataFrame(filas).set_index('ticker')
+
+# Resumen de backtest_arima para la tabla por ticker
+def _resumen_backtest(ticker, order, kwargs, series):
+    fila = {'ticker': ticker, 'order': order}
+    try:
+        bt = backtest_arima(series, order=order, **kwargs)
+    except Exception as e:
+        fila['error'] = str(e)
+        return fila
+    metricas = bt['metricas']
+    errores = bt['predicciones']['error']
+    fila.update({
+        'refits': bt['refits'],
+        'origenes': int(metricas['n'].iloc[0]),
+        'rmse_1': metricas['rmse'].iloc[0],
+        'mae_1': metricas['mae'].iloc[0],
+        f"rmse_{metricas.index[-1]}": metricas['rmse'].iloc[-1],
+        f"mae_{metricas.index[-1]}": metricas['mae'].iloc[-1],
+        'rmse': np.sqrt(np.mean(errores ** 2)),
+        'mae': np.mean(np.abs(errores)),
+    })
+    return fila
+
+def _backtest_en_worker(ticker, order, kwargs):
+    return _resumen_backtest(ticker, order, kwargs, panel_worker()[ticker])
+
+# Backtest walk-forward de todos los tickers en el pool con el panel compartido.
+# Por defecto usa ARIMA(1, d, 1) con d del ADF en lote; `orders` permite fijar el orden por ticker.
+# Devuelve RMSE/MAE a 1 paso, al último horizonte y en total, una fila por ticker.
+@instrumentar()
+def backtest_panel(data, tickers, orders=None, n_workers=None, **kwargs):
+    panel = data[list(tickers)]
+    if orders is None:
+        adf = adf_lote(panel)
+        orders = {ticker: (1, max(adf[ticker]) if adf[ticker] else 1, 1) for ticker in tickers}
+    if n_workers == 1:
+        filas = [_resumen_backtest(ticker, orders[ticker], kwargs, panel[ticker]) for ticker in tickers]
+    else:
+        with _pool_con_panel(panel, n_workers) as executor:
+            filas = list(executor.map(_backtest_en_worker, tickers, [orders[t] for t in tickers],
+                                      [kwargs] * len(tickers)))
+    return pd.DataFrame(filas).set_index('ticker')
+
+# Artefactos del análisis por ticker: tabla ADF/ARIMA, parámetros de cada modelo y pronósticos
+def guardar_resultados_analisis(resultados, output_dir=None):
+    tabla = resultados.drop(columns=['forecast', 'params', 'pvalues'])
+    tabla['order'] = tabla['order'].astype(str)
+    guardar_resultado('analisis', tabla, output_dir)
+    guardar_resultado('arima', {
+        ticker: {'order': fila['order'], 'aic': fila['aic'], 'bic': fila['bic'],
+                 'params': fila['params'], 'pvalues': fila['pvalues'], 'error': fila.get('error')}
+        for ticker, fila in resultados.iterrows()
+    }, output_dir)
+    forecasts = [f.rename_axis('date').rename('forecast').to_frame().assign(ticker=t)
+                 for t, f in resultados['forecast'].items() if f is not None]
+    if forecasts:
+        guardar_resultado('forecasts', pd.concat(forecasts).reset_index(), output_dir)
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""Modelos ARIMA: ajuste, búsqueda de orden, pronóstico reintegrado y backtest walk-forward."""
+
+import warnings
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+
+# statsmodels fija sus ValueWarning en 'always' al importarse, por encima de un filtro previo; los
+# avisos de frecuencia y convergencia de cada ajuste se silencian aquí, como en el script original
+warnings.filterwarnings('ignore', module='statsmodels')
+
+from .perfil import instrumentar
+from .salidas import graficar
+from .cache_resultados import memoizar
+
+# Iteraciones y convergencia del optimizador de un ajuste ARIMA
+def _metricas_optimizador(results):
+    retvals = getattr(results, 'mle_retvals', None) or {}
+    return {'iteraciones': retvals.get('iterations'), 'convergio': retvals.get('converged')}
+
+# Serie diferenciada sobre la que se ajusta el ARMA
+def _diferenciar(series, d):
+    if d > 0:
+        # Diferenciar la serie para volverla estacionaria
+        return series.diff(d).dropna()
+    return series.dropna()
+
+# Forecast en la serie diferenciada reintegrado a la escala original
+def _pronostico_reintegrado(series, results, forecast_steps=30):
+    forecast_diff = results.get_forecast(steps=forecast_steps)
+    forecast_mean_diff = forecast_diff.predicted_mean
+
+    # Reintegrar para volver a escala original
+    last_value = series.dropna().iloc[-1]
+    forecast_values = forecast_mean_diff.cumsum() + last_value
+
+    # Crear índice futuro (business days desde el último día)
+    forecast_index = pd.date_range(start=series.index[-1], periods=forecast_steps + 1, freq='B')[1:]
+    return pd.Series(forecast_values.values, index=forecast_index)
+
+# Ajuste ARIMA tal como se guarda en la caché: parámetros y estadísticos, unos cientos de bytes
+# frente a los megabytes del objeto de resultados (que lleva la serie y las salidas del filtro).
+# Lo demás (get_forecast, forecast, extend, summary...) se pide a los resultados completos, que se
+# reconstruyen la primera vez con una pasada del filtro de Kalman sobre los parámetros guardados.
+class _AjusteCompacto:
+    def __init__(self, results):
+        self.params = results.params
+        self.param_names = list(results.param_names)
+        self.pvalues = results.pvalues
+        self.aic, self.bic = float(results.aic), float(results.bic)
+        self.cov_type = results.cov_type
+        self.mle_retvals = getattr(results, 'mle_retvals', None)
+        self._serie, self._orden, self._completo = None, None, None
+
+    # La serie y el orden no se guardan (ya están en la clave): se asocian al leer de la caché
+    def asociar(self, serie, orden):
+        self._serie, self._orden = serie, orden
+        return self
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k not in ('_serie', '_orden', '_completo')}
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado, _serie=None, _orden=None, _completo=None)
+
+    def __getattr__(self, nombre):
+        if nombre.startswith('_') or self._serie is None:
+            raise AttributeError(nombre)
+        if self._completo is None:
+            modelo = ARIMA(self._serie, order=self._orden)
+            self._completo = modelo.filter(np.asarray(self.params), cov_type=self.cov_type)
+        return getattr(self._completo, nombre)
+
+# Ajuste ARMA(p, q) con constante; start_params permite arrancar desde otro ajuste.
+# Memoizado por contenido (serie con sus fechas, orden y parámetros iniciales): una serie sin barras
+# nuevas no se vuelve a ajustar. Se guarda el _AjusteCompacto; un ajuste recién hecho se devuelve
+# completo y uno leído de la caché, compacto.
+def _ajustar_arma(differenced_series, p, q, start_params=None):
+    parametros = {'order': (p, 0, q), 'start_params': None if start_params is None else np.asarray(start_params)}
+    ajustado = []
+
+    def ajustar():
+        ajustado.append(_ajustar_arma_sin_cache(differenced_series, p, q, start_params))
+        return _AjusteCompacto(ajustado[0])
+
+    compacto = memoizar('arima', differenced_series, parametros, ajustar)
+    return ajustado[0] if ajustado else compacto.asociar(differenced_series, (p, 0, q))
+
+@instrumentar('ARIMA.fit', metricas=_metricas_optimizador)
+def _ajustar_arma_sin_cache(differenced_series, p, q, start_params=None):
+    model = ARIMA(differenced_series, order=(p, 0, q))  # d=0 porque ya se aplicó manualmente
+    if start_params is not None:
+        try:
+            return model.fit(start_params=start_params)
+        except Exception:
+            pass  # p.ej. parámetros iniciales no estacionarios: se ajusta desde cero
+    return model.fit()
+
+# Ajuste ARIMA sobre serie diferenciada y forecast reintegrado (sin imprimir ni graficar)
+def ajustar_arima(series, order=(1,1,1), forecast_steps=30):
+    results = _ajustar_arma(_diferenciar(series, order[1]), order[0], order[2])
+    return results, _pronostico_reintegrado(series, results, forecast_steps)
+
+# Búsqueda automática de (p, q) por AIC/BIC con d fijo.
+# Búsqueda por pasos (Hyndman-Khandakar): parte de los modelos pequeños y solo prueba los vecinos
+# (p±1, q±1) del mejor modelo actual hasta que ninguno lo mejora. Es una heurística: ajusta una
+# fracción de la malla y puede quedarse en un óptimo local sin llegar al mejor orden de la malla.
+# Cada orden se ajusta desde cero: arrancar desde los parámetros de otro orden no ahorraba tiempo
+# y a veces convergía a un óptimo local mucho peor.
+# Devuelve (orden, resultados del mejor modelo, {(p, q): criterio de cada modelo ajustado}).
+@instrumentar()
+def buscar_orden_arima(series, d, max_p=3, max_q=3, criterio='aic'):
+    differenced_series = _diferenciar(series, d)
+    ajustes = {}
+
+    def probar(p, q):
+        if (p, q) in ajustes or not (0 <= p <= max_p and 0 <= q <= max_q):
+            return
+        try:
+            ajustes[(p, q)] = _ajustar_arma(differenced_series, p, q)
+        except Exception:
+            ajustes[(p, q)] = None
+
+    def mejor():
+        validos = {k: getattr(r, criterio) for k, r in ajustes.items() if r is not None}
+        return min(validos, key=validos.get) if validos else None
+
+    for p, q in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+        probar(p, q)
+    actual = mejor()
+    while actual is not None:
+        for dp in (-1, 0, 1):
+            for dq in (-1, 0, 1):
+                probar(actual[0] + dp, actual[1] + dq)
+        siguiente = mejor()
+        if siguiente == actual:
+            break
+        actual = siguiente
+    if actual is None:
+        raise ValueError("Ningún orden ARIMA pudo ajustarse")
+    tabla = {k: getattr(r, criterio) for k, r in ajustes.items() if r is not None}
+    return (actual[0], d, actual[1]), ajustes[actual], tabla
+
+# Ajuste ARIMA sobre serie diferenciada y forecast (con reintegración)
+# Con auto=True el orden (p, q) se elige con buscar_orden_arima y de `order` solo se usa d
+@instrumentar()
+def fit_arima(series, ticker, order=(1,1,1), forecast_steps=30, auto=False, max_p=3, max_q=3, criterio='aic'):
+    try:
+        d = order[1]
+        if auto:
+            order, results, _ = buscar_orden_arima(series, d, max_p=max_p, max_q=max_q, criterio=criterio)
+            forecast_series = _pronostico_reintegrado(series, results, forecast_steps)
+            print(f'Orden elegido para {ticker} por {criterio.upper()}: ARIMA{order}')
+        else:
+            results, forecast_series = ajustar_arima(series, order=order, forecast_steps=forecast_steps)
+        print(f'ARIMA Model Summary para {ticker} (diferenciada d={d}):')
+        print(results.summary())
+
+        # Graficar (matplotlib solo se carga si hay figuras)
+        if graficar():
+            from .graficos import plot_forecast
+            plot_forecast(series, forecast_series, ticker, d)
+
+        return results.aic
+    except Exception as e:
+        print(f"Error fitting ARIMA para {ticker}: {e}")
+        return np.inf
+
+# Inversa de la diferencia de rezago d que usa _diferenciar: precio[t] = precio[t-d] + dif[t]
+def _reintegrar(ultimos_precios, forecast_diff, d):
+    if d == 0:
+        return np.asarray(forecast_diff, dtype=np.float64)
+    niveles = list(ultimos_precios[-d:])
+    for valor in forecast_diff:
+        niveles.append(niveles[-d] + valor)
+    return np.array(niveles[d:])
+
+# Backtest walk-forward de un ARIMA sobre la serie diferenciada (misma convención que fit_arima).
+# Se optimiza una vez cada `refit_cada` observaciones (arrancando de los parámetros anteriores);
+# entre refits cada observación nueva entra por el filtro del modelo de espacio de estados
+# (results.extend) con los parámetros fijos, así que no se paga un ajuste completo por paso.
+# En cada origen se pronostican `horizonte` pasos, se reintegran a precios y se comparan con el real.
+# El resultado completo se memoiza: una serie sin barras nuevas no repite el recorrido.
+@instrumentar()
+def backtest_arima(series, order=(1,1,1), inicio=None, refit_cada=60, horizonte=5):
+    parametros = {'order': tuple(order), 'inicio': inicio, 'refit_cada': refit_cada, 'horizonte': horizonte}
+    return memoizar('backtest_arima', series.dropna(), parametros,
+                    lambda: _backtest_arima(series, order, inicio, refit_cada, horizonte))
+
+def _backtest_arima(series, order, inicio, refit_cada, horizonte):
+    p, d, q = order
+    precios = series.dropna()
+    valores = precios.to_numpy(dtype=np.float64)
+    dif = _diferenciar(precios, d).to_numpy(dtype=np.float64)
+    n = len(dif)
+    inicio = inicio or max(30, int(n * 0.7))
+    if inicio >= n:
+        raise ValueError(f"Serie demasiado corta para el backtest ({n} observaciones, inicio={inicio})")
+
+    filas = []
+    results = None
+    refits = 0
+    for t in range(inicio, n):
+        # El modelo ha visto dif[:t], es decir, los precios hasta valores[t + d - 1]
+        if results is None or (t - inicio) % refit_cada == 0:
+            results = _ajustar_arma(dif[:t], p, q, start_params=None if results is None else results.params)
+            refits += 1
+        else:
+            results = results.extend(dif[t - 1:t])
+        pronostico = _reintegrar(valores[:t + d], results.forecast(horizonte), d)
+        for k in range(min(horizonte, n - t)):
+            filas.append((precios.index[t + d - 1], k + 1, pronostico[k], valores[t + d + k]))
+
+    predicciones = pd.DataFrame(filas, columns=['origen', 'horizonte', 'pronostico', 'real'])
+    predicciones['error'] = predicciones['real'] - predicciones['pronostico']
+    errores = predicciones.groupby('horizonte')['error']
+    metricas = pd.DataFrame({
+        'rmse': errores.apply(lambda e: np.sqrt(np.mean(e ** 2))),
+        'mae': errores.apply(lambda e: np.mean(np.abs(e))),
+        'n': errores.size(),
+    })
+    return {'metricas': metricas, 'predicciones': predicciones, 'refits': refits}
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""Caché en disco de resultados (ADF, ajustes ARIMA, Johansen) direccionada por contenido.
+
+La clave es un hash de los datos de entrada y de los parámetros del cálculo: un ticker sin barras
+nuevas reutiliza sus resultados y uno con barras nuevas cambia de clave y se recalcula. Cada
+resultado es un pickle; las entradas caducan por antigüedad y, por encima del tamaño máximo, se
+expulsan de la usada hace más tiempo a la más reciente (LRU por fecha de modificación, que se
+renueva en cada acierto).
+"""
+
+import os
+import time
+import pickle
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+import statsmodels
+
+# ACTIVIDAD7_CACHE_RESULTADOS=0 desactiva la caché; ACTIVIDAD7_CACHE_MB y ACTIVIDAD7_CACHE_DIAS
+# fijan el tamaño máximo y la antigüedad máxima (desde el último uso) de las entradas
+RESULT_CACHE_DIR = os.environ.get('ACTIVIDAD7_CACHE_DIR', 'cache_resultados')
+MAX_MB = float(os.environ.get('ACTIVIDAD7_CACHE_MB', 512))
+MAX_DIAS = float(os.environ.get('ACTIVIDAD7_CACHE_DIAS', 30))
+_activa = os.environ.get('ACTIVIDAD7_CACHE_RESULTADOS', '1') == '1'
+
+# Cambia el formato de las claves cuando cambia lo que se guarda; la versión de statsmodels también
+# entra en la clave porque los objetos de resultados se deserializan con sus clases
+_VERSION = 2
+_tamano_total = None  # bytes en disco según este proceso (None = todavía sin inventariar)
+
+def configurar_cache(activa=None, directorio=None, max_mb=None, max_dias=None):
+    global _activa, RESULT_CACHE_DIR, MAX_MB, MAX_DIAS, _tamano_total
+    if activa is not None:
+        _activa = activa
+    if directorio is not None and directorio != RESULT_CACHE_DIR:
+        RESULT_CACHE_DIR, _tamano_total = directorio, None
+    if max_mb is not None:
+        MAX_MB = max_mb
+    if max_dias is not None:
+        MAX_DIAS = max_dias
+
+def cache_activa():
+    return _activa
+
+def _actualizar_hash(h, obj):
+    if isinstance(obj, pd.DataFrame):
+        h.update(b'DataFrame')
+        _actualizar_hash(h, list(obj.columns))
+        _actualizar_hash(h, obj.to_numpy(dtype=np.float64))
+        _actualizar_hash(h, obj.index.to_numpy())
+    elif isinstance(obj, pd.Series):
+        h.update(b'Series')
+        _actualizar_hash(h, obj.name)
+        _actualizar_hash(h, obj.to_numpy(dtype=np.float64))
+        _actualizar_hash(h, obj.index.to_numpy())
+    elif isinstance(obj, np.ndarray):
+        if obj.dtype == object:
+            _actualizar_hash(h, obj.tolist())
+        else:
+            h.update(f'ndarray{obj.dtype.str}{obj.shape}'.encode())
+            h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(f'{type(obj).__name__}{len(obj)}('.encode())
+        for valor in obj:
+            _actualizar_hash(h, valor)
+        h.update(b')')
+    elif isinstance(obj, dict):
+        _actualizar_hash(h, sorted(obj.items(), key=lambda kv: repr(kv[0])))
+    else:
+        h.update(repr(obj).encode())
+
+# Clave de un cálculo: etapa, datos de entrada (Series, DataFrames, arrays) y parámetros
+def clave(etapa, entradas, parametros=None):
+    h = hashlib.sha256()
+    _actualizar_hash(h, (_VERSION, statsmodels.__version__, etapa, entradas, parametros or {}))
+    return h.hexdigest()
+
+def _ruta(k):
+    return os.path.join(RESULT_CACHE_DIR, k[:2], k + '.pkl')
+
+# (True, resultado) si la clave está en caché; (False, None) si no
+def leer(k):
+    ruta = _ruta(k)
+    try:
+        with open(ruta, 'rb') as f:
+            valor = pickle.load(f)
+    except FileNotFoundError:
+        return False, None
+    except Exception:
+        # Entrada corrupta o de clases que ya no existen: se descarta y se recalcula
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+        return False, None
+    try:
+        os.utime(ruta)
+    except OSError:
+        pass
+    return True, valor
+
+def guardar(k, valor):
+    global _tamano_total
+    try:
+        datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return False  # resultado no serializable: simplemente no se guarda
+    ruta = _ruta(k)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    # Escritura atómica: otros procesos del pool pueden estar leyendo la misma entrada
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(datos)
+    os.replace(temporal, ruta)
+    if _tamano_total is None or _tamano_total + len(datos) > MAX_MB * 2 ** 20:
+        expulsar()
+    else:
+        _tamano_total += len(datos)
+    return True
+
+# Expulsión: primero lo que lleva más de MAX_DIAS sin usarse; después, si se supera MAX_MB, lo
+# usado hace más tiempo hasta quedar en el 80% del máximo (margen para no expulsar en cada escritura).
+# Devuelve el número de entradas borradas.
+def expulsar():
+    global _tamano_total
+    ahora = time.time()
+    entradas = []
+    for raiz, _, archivos in os.walk(RESULT_CACHE_DIR):
+        for nombre in archivos:
+            ruta = os.path.join(raiz, nombre)
+            try:
+                estado = os.stat(ruta)
+            except OSError:
+                continue
+            entradas.append((estado.st_mtime, estado.st_size, ruta))
+    entradas.sort()
+    total = sum(tamano for _, tamano, _ in entradas)
+    limite = MAX_MB * 2 ** 20
+    objetivo = limite if total <= limite else 0.8 * limite
+    borradas = 0
+    for mtime, tamano, ruta in entradas:
+        if ahora - mtime <= MAX_DIAS * 86400 and total <= objetivo:
+            break
+        try:
+            os.remove(ruta)
+        except OSError:
+            continue
+        total -= tamano
+        borradas += 1
+    _tamano_total = total
+    return borradas
+
+def limpiar_cache():
+    global _tamano_total
+    for raiz, _, archivos in os.walk(RESULT_CACHE_DIR):
+        for nombre in archivos:
+            try:
+                os.remove(os.path.join(raiz, nombre))
+            except OSError:
+                pass
+    _tamano_total = 0
+
+# Devuelve el resultado guardado para (etapa, entradas, parámetros) o lo calcula con `calcular()` y
+# lo guarda. Con la caché desactivada solo llama a `calcular()`.
+def memoizar(etapa, entradas, parametros, calcular):
+    if not _activa:
+        return calcular()
+    k = clave(etapa, entradas, parametros)
+    encontrado, valor = leer(k)
+    if encontrado:
+        return valor
+    valor = calcular()
+    guardar(k, valor)
+    return valor
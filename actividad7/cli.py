@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Línea de comandos: python -m actividad7 --tickers LLY,JPM --stages adf,johansen
+
+Los argumentos se procesan antes de importar nada pesado; cada etapa carga sus dependencias
+al ejecutarse (un trabajo de solo cointegración no importa matplotlib ni el modelo ARIMA).
+"""
+
+import argparse
+import sys
+
+TICKERS = 'LLY,WELL,WFC,JPM'
+START_DATE = '2024-09-02'
+END_DATE = '2025-06-09'
+
+
+def _lista(texto):
+    return [t.strip() for t in texto.split(',') if t.strip()]
+
+
+def crear_parser():
+    # Copia de pipeline.ETAPAS para no importar el paquete al mostrar la ayuda
+    etapas = ('adf', 'random_walk', 'correlograma', 'medias_moviles', 'arima', 'backtest', 'johansen', 'pares')
+    parser = argparse.ArgumentParser(prog='actividad7',
+                                     description='Raíz unitaria, caminatas aleatorias, ARIMA y cointegración de acciones')
+    parser.add_argument('--tickers', type=_lista, default=_lista(TICKERS), help='tickers separados por comas')
+    parser.add_argument('--start', default=START_DATE, help='fecha inicial (AAAA-MM-DD)')
+    parser.add_argument('--end', default=END_DATE, help='fecha final, excluida (AAAA-MM-DD)')
+    parser.add_argument('--stages', type=_lista, default=None,
+                        help=f"etapas separadas por comas, o 'all' ({', '.join(etapas)}); "
+                             "por defecto todas menos backtest")
+    parser.add_argument('--offline', metavar='DIR', help='leer precios de DIR/<ticker>.parquet|.csv en lugar de Yahoo Finance')
+    parser.add_argument('--source-url', metavar='URL', help='leer precios de URL/<ticker>.csv (p. ej. un servidor local de prueba)')
+    parser.add_argument('--cache-dir', help='directorio de la caché local de precios')
+    parser.add_argument('--chunk-size', type=int, help='tickers por petición de la descarga masiva (por defecto 50)')
+    parser.add_argument('--concurrency', type=int, help='peticiones de descarga simultáneas (por defecto 4)')
+    parser.add_argument('--rate-limit', type=float, metavar='N', help='máximo de tickers pedidos por segundo')
+    parser.add_argument('--retries', type=int, default=3, help='intentos por ticker; solo se repiten los que fallan')
+    parser.add_argument('--timeout', type=float, default=10, help='timeout de cada petición, en segundos')
+    parser.add_argument('--panel-file', metavar='RUTA', help='guardar el panel de precios en RUTA.npy/.json y mapearlo desde disco')
+    parser.add_argument('--float32', action='store_true', help='panel de precios en float32 (mitad de memoria)')
+    parser.add_argument('--result-cache-dir', help='directorio de la caché de resultados (ADF, ARIMA, Johansen)')
+    parser.add_argument('--no-result-cache', action='store_true', help='recalcular todo sin leer ni escribir la caché de resultados')
+    parser.add_argument('--headless', action='store_true', help='modo batch: sin pantalla, resultados a archivo')
+    parser.add_argument('--no-figures', action='store_true', help='en modo batch, no generar figuras')
+    parser.add_argument('--output', help='directorio de artefactos del modo batch')
+    parser.add_argument('--parallel', action='store_true', help='análisis por ticker en un pool de procesos')
+    parser.add_argument('--workers', type=int, help='procesos del pool (por defecto, todos los núcleos)')
+    parser.add_argument('--fixed-order', action='store_true', help='usar siempre ARIMA(1, d, 1) en lugar de elegir (p, q) por AIC')
+    parser.add_argument('--profile', nargs='?', const='tiempo', choices=['tiempo', 'memoria'],
+                        help='perfilado por etapa (memoria: también memoria pico)')
+    return parser, etapas
+
+
+def main(argv=None):
+    parser, etapas_validas = crear_parser()
+    args = parser.parse_args(argv)
+    etapas = args.stages
+    if etapas == ['all']:
+        etapas = list(etapas_validas)
+    elif etapas is not None and set(etapas) - set(etapas_validas):
+        parser.error(f"etapas desconocidas: {', '.join(sorted(set(etapas) - set(etapas_validas)))}")
+
+    import warnings
+    warnings.filterwarnings('ignore')
+
+    from . import salidas
+    salidas.configurar(headless=True if args.headless else None, figuras=False if args.no_figures else None,
+                       output_dir=args.output)
+    if args.no_result_cache or args.result_cache_dir:
+        from .cache_resultados import configurar_cache
+        configurar_cache(activa=False if args.no_result_cache else None, directorio=args.result_cache_dir)
+    if args.profile:
+        from .perfil import activar_perfilado
+        activar_perfilado(memoria=args.profile == 'memoria')
+
+    fuente = None
+    if args.offline:
+        from .datos import fuente_local
+        fuente = fuente_local(args.offline)
+    elif args.source_url:
+        from .descarga import fuente_http
+        fuente = fuente_http(args.source_url, timeout=args.timeout)
+    else:
+        import functools
+        from .datos import fuente_yahoo
+        fuente = functools.partial(fuente_yahoo, timeout=args.timeout)
+    opciones_descarga = {'tamano_lote': args.chunk_size, 'max_concurrencia': args.concurrency,
+                         'max_por_segundo': args.rate_limit, 'retries': args.retries}
+
+    from .pipeline import ejecutar
+    salida = ejecutar(args.tickers, args.start, args.end, etapas=etapas, fuente=fuente, cache_dir=args.cache_dir,
+                      modo_paralelo=args.parallel, n_workers=args.workers, orden_automatico=not args.fixed_order,
+                      precision='float32' if args.float32 else 'float64', ruta_panel=args.panel_file,
+                      opciones_descarga=opciones_descarga)
+    return 0 if salida is not None else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""Cointegración: Johansen para un conjunto de series, por pares y criba de pares en lote."""
+
+import itertools
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.vector_ar.vecm import coint_johansen
+from statsmodels.tsa.adfvalues import mackinnonp, mackinnoncrit
+
+from .perfil import instrumentar
+from .paralelo import _pool_con_panel, panel_worker
+from .cache_resultados import memoizar
+from .panel import valores_completos
+
+# coint_johansen memoizado por los valores de las series (sin nombres ni fechas) y parámetros
+def _johansen(df, det_order=0, k_ar_diff=1):
+    return memoizar('johansen', df, {'det_order': det_order, 'k_ar_diff': k_ar_diff},
+                    lambda: coint_johansen(df, det_order=det_order, k_ar_diff=k_ar_diff))
+
+# statsmodels solo tiene tabulados los valores críticos de Johansen hasta 12 series; con más
+# devuelve NaN y ningún estadístico "supera" su valor crítico
+MAX_SERIES_JOHANSEN = 12
+
+def _aviso_max_series(n):
+    return (f"critical values are only tabulated for up to {MAX_SERIES_JOHANSEN} series ({n} given); "
+            "the cointegration rank cannot be determined")
+
+# Test de cointegración de Johansen como diccionario (para los artefactos del modo batch). Con más
+# de MAX_SERIES_JOHANSEN series el rango queda en None y 'message' explica por qué
+@instrumentar()
+def johansen_resultado(df, det_order=0, k_ar_diff=1):
+    result = _johansen(valores_completos(df), det_order=det_order, k_ar_diff=k_ar_diff)
+    resultado = {
+        'tickers': list(df.columns),
+        'trace_statistic': result.lr1,
+        'critical_values_trace': result.cvt,
+        'max_eigen_statistic': result.lr2,
+        'critical_values_max_eigen': result.cvm,
+        'cointegration_rank_95': int(np.sum(np.cumprod(result.lr1 > result.cvt[:, 1]))),
+    }
+    if df.shape[1] > MAX_SERIES_JOHANSEN:
+        resultado.update(cointegration_rank_95=None, message=_aviso_max_series(df.shape[1]))
+    return resultado
+
+# Johansen cointegration test for a set of series (with pair_name, also interpreted as a pair)
+@instrumentar()
+def cointegration_test(df, pair_name=''):
+    label = f" for {pair_name}" if pair_name else ""
+    if df.shape[1] > MAX_SERIES_JOHANSEN:
+        print(f"Johansen Cointegration Test{label}: skipped, {_aviso_max_series(df.shape[1])}\n")
+        return
+    values = valores_completos(df)
+    if len(values) < 2:
+        print(f"Johansen Cointegration Test{label}: Insufficient data to perform test")
+        return
+    print(f"\nJohansen Cointegration Test{label}:")
+    try:
+        result = _johansen(values, det_order=0, k_ar_diff=1)
+        print(f"Trace statistic: {result.lr1}")
+        print(f"Critical values (90%, 95%, 99%): {result.cvt}")
+        cointegrated = False
+        for i in range(len(result.lr1)):
+            if result.lr1[i] > result.cvt[i, 1]:  # 95% critical value
+                print(f"r = {i}: Cointegration exists at 95% confidence level")
+                if i == 0:
+                    cointegrated = True
+            else:
+                print(f"r = {i}: No cointegration at 95% confidence level")
+        if pair_name:
+            print(f"\nInterpretation for {pair_name}:")
+        if pair_name and cointegrated:
+            print(f"The pair {pair_name} is cointegrated at the 95% confidence level. This suggests a long-term equilibrium relationship, making it suitable for pairs trading strategies, as deviations from the equilibrium are likely to revert.")
+        elif pair_name:
+            print(f"The pair {pair_name} is not cointegrated at the 95% confidence level. The stocks likely move independently, and pairs trading may not be effective.")
+        print("\n")
+    except Exception as e:
+        print(f"Error in Johansen test{label}: {e}\n")
+
+# Function to perform pairwise cointegration tests
+@instrumentar()
+def pairwise_cointegration_test(data, tickers):
+    print("\n=== Pairwise Cointegration Tests ===")
+    pairs = list(itertools.combinations(tickers, 2))
+    for ticker1, ticker2 in pairs:
+        # Run cointegration test for the pair (a view of both columns when data is a PanelPrecios)
+        pair_name = f"{ticker1}-{ticker2}"
+        cointegration_test(data[[ticker1, ticker2]], pair_name)
+
+# Engle-Granger screen for a block of pairs at once: OLS of y on x (with constant) and a
+# one-lag ADF on the residuals, all vectorized over the columns of Y and X (T x B arrays).
+def _engle_granger_block(Y, X):
+    x_mean, y_mean = X.mean(axis=0), Y.mean(axis=0)
+    beta = ((X - x_mean) * (Y - y_mean)).sum(axis=0) / ((X - x_mean) ** 2).sum(axis=0)
+    resid = Y - y_mean - beta * (X - x_mean)
+    # Δe_t = γ e_{t-1} + φ Δe_{t-1} + ε_t, solved through the 2x2 normal equations
+    de = np.diff(resid, axis=0)
+    y, z1, z2 = de[1:], resid[1:-1], de[:-1]
+    s11, s12, s22 = (z1 * z1).sum(axis=0), (z1 * z2).sum(axis=0), (z2 * z2).sum(axis=0)
+    s1y, s2y = (z1 * y).sum(axis=0), (z2 * y).sum(axis=0)
+    det = s11 * s22 - s12 ** 2
+    gamma = (s22 * s1y - s12 * s2y) / det
+    phi = (s11 * s2y - s12 * s1y) / det
+    sigma2 = ((y - gamma * z1 - phi * z2) ** 2).sum(axis=0) / (y.shape[0] - 2)
+    return gamma / np.sqrt(sigma2 * s22 / det), beta
+
+# Johansen test for one pair (None if it cannot be computed)
+def _johansen_pair(panel, ticker1, ticker2, det_order=0, k_ar_diff=1):
+    try:
+        result = _johansen(valores_completos(panel[[ticker1, ticker2]]), det_order=det_order, k_ar_diff=k_ar_diff)
+    except Exception:
+        return None
+    evec = result.evec[:, 0]
+    return {
+        'trace_r0': result.lr1[0],
+        'trace_r1': result.lr1[1],
+        'crit95_r0': result.cvt[0, 1],
+        'crit95_r1': result.cvt[1, 1],
+        'trace_ratio': result.lr1[0] / result.cvt[0, 1],
+        # Spread = ticker1 - hedge_ratio * ticker2
+        'hedge_ratio': -evec[1] / evec[0],
+    }
+
+def _johansen_en_worker(ticker1, ticker2, det_order, k_ar_diff):
+    return _johansen_pair(panel_worker(), ticker1, ticker2, det_order, k_ar_diff)
+
+# Groups of tickers with the same coverage (the same non-NaN rows): the column indices of each
+# group and its row mask. A panel without gaps, or whose tickers start on the same date, is one group.
+def _coverage_groups(valid):
+    packed = np.packbits(valid, axis=0).T
+    _, first, group = np.unique(packed, axis=0, return_index=True, return_inverse=True)
+    group = group.ravel()
+    return [(np.flatnonzero(group == g), valid[:, first[g]]) for g in range(len(first))]
+
+# Correlation and Engle-Granger stages for the pairs between two coverage groups (or within one),
+# on the rows both groups observe. Returns (i, j, corr, eg_stat, eg_pvalue) with i < j as panel columns.
+def _screen_groups(values, rows, cols_a, cols_b, min_corr, max_eg_pvalue, block_size):
+    same = cols_a is cols_b
+    cols = cols_a if same else np.concatenate([cols_a, cols_b])
+    prices = values[:, cols] if rows.all() else values[rows][:, cols]
+
+    # 1) Correlation of price levels over the pair's common sample
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (prices - prices.mean(axis=0)) / prices.std(axis=0)
+    right = slice(0, len(cols_a)) if same else slice(len(cols_a), None)
+    corr = z[:, :len(cols_a)].T @ z[:, right] / len(z)
+    if same:
+        p_idx, q_idx = np.triu_indices(len(cols_a), k=1)
+    else:
+        p_idx, q_idx = np.indices(corr.shape).reshape(2, -1)
+    pair_corr = corr[p_idx, q_idx]
+    keep = np.abs(pair_corr) >= min_corr
+    p_idx, q_idx, pair_corr = p_idx[keep], q_idx[keep] + (0 if same else len(cols_a)), pair_corr[keep]
+    # Same orientation as a single panel-wide screen: y is the ticker that comes first in the panel
+    swap = cols[p_idx] > cols[q_idx]
+    p_idx, q_idx = np.where(swap, q_idx, p_idx), np.where(swap, p_idx, q_idx)
+
+    # 2) Engle-Granger residual ADF in blocks
+    eg_crit = mackinnoncrit(N=2, regression='c', nobs=prices.shape[0] - 2)
+    found = []
+    for start in range(0, len(p_idx), block_size):
+        bp, bq = p_idx[start:start + block_size], q_idx[start:start + block_size]
+        stats, _ = _engle_granger_block(prices[:, bp], prices[:, bq])
+        # Cheap cut at the 10% critical value before computing exact p-values
+        lenient = stats < eg_crit[2] if max_eg_pvalue <= 0.1 else np.isfinite(stats)
+        for p, q, c, stat in zip(bp[lenient], bq[lenient], pair_corr[start:start + block_size][lenient],
+                                 stats[lenient]):
+            pvalue = mackinnonp(stat, regression='c', N=2)
+            if pvalue <= max_eg_pvalue:
+                found.append((cols[p], cols[q], c, stat, pvalue))
+    return found
+
+# Scalable pairs screen: a correlation matrix and a batched Engle-Granger test prune the
+# candidate pairs cheaply, then Johansen runs only on the survivors (in parallel).
+# Every pair is tested on the rows where both tickers have prices (the same sample Johansen
+# uses), so a short history only shrinks its own pairs; tickers with fewer than `min_obs`
+# prices are left out. Returns the survivors ranked by trace statistic relative to its 95%
+# critical value.
+@instrumentar()
+def cointegration_screen(data, tickers, min_corr=0.5, max_eg_pvalue=0.2, block_size=5000,
+                         n_workers=None, det_order=0, k_ar_diff=1, min_obs=10):
+    columns = ['ticker1', 'ticker2', 'corr', 'eg_stat', 'eg_pvalue', 'trace_r0', 'trace_r1',
+               'crit95_r0', 'crit95_r1', 'trace_ratio', 'hedge_ratio', 'cointegrated']
+    tickers = list(tickers)
+    panel = data[tickers]
+    values = panel.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    enough = np.flatnonzero(valid.sum(axis=0) >= min_obs)
+    if len(enough) < 2:
+        return pd.DataFrame(columns=columns)
+
+    # 1-2) Correlation and Engle-Granger for each pair of coverage groups, on their common rows
+    groups = [(enough[g], rows) for g, rows in _coverage_groups(valid[:, enough])]
+    candidates = []
+    for a, b in itertools.combinations_with_replacement(range(len(groups)), 2):
+        (cols_a, rows_a), (cols_b, rows_b) = groups[a], groups[b]
+        rows = rows_a & rows_b
+        if rows.sum() < min_obs or (a == b and len(cols_a) < 2):
+            continue
+        found = _screen_groups(values, rows, cols_a, cols_a if a == b else cols_b,
+                               min_corr, max_eg_pvalue, block_size)
+        candidates.extend((tickers[i], tickers[j], c, stat, pvalue) for i, j, c, stat, pvalue in found)
+    # 3) Johansen on the survivors
+    if not candidates:
+        return pd.DataFrame(columns=columns)
+    args = [(c[0], c[1], det_order, k_ar_diff) for c in candidates]
+    if n_workers == 1 or len(candidates) == 1:
+        johansen = [_johansen_pair(panel, *a) for a in args]
+    else:
+        with _pool_con_panel(panel, n_workers) as executor:
+            johansen = list(executor.map(_johansen_en_worker, *zip(*args)))
+
+    rows = []
+    for (ticker1, ticker2, c, stat, pvalue), jres in zip(candidates, johansen):
+        if jres is None:
+            continue
+        rows.append({'ticker1': ticker1, 'ticker2': ticker2, 'corr': c, 'eg_stat': stat,
+                     'eg_pvalue': pvalue, **jres, 'cointegrated': jres['trace_r0'] > jres['crit95_r0']})
+    table = pd.DataFrame(rows, columns=columns)
+    table['pair'] = table['ticker1'] + '-' + table['ticker2']
+    table = table.set_index('pair')
+    return table.sort_values('trace_ratio', ascending=False)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""Correlogramas en lote: ACF (por FFT), PACF (Durbin-Levinson), bandas de confianza y Ljung-Box de
+todo un panel de series diferenciadas en una pasada vectorizada, más los órdenes (p, q) sugeridos.
+
+Los resultados son arrays (tickers x rezagos) que se exportan como tabla; las figuras de graficos.py
+solo los dibujan.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import fft, stats
+
+from .perfil import instrumentar
+
+# Filas por bloque de FFT: acota la memoria del espectro en universos grandes
+_FILAS_POR_BLOQUE = 512
+
+# Serie sobre la que se calcula el correlograma: d diferencias y sin NaN, igual que
+# make_stationary(...).dropna() (np.diff deja los huecos igual que pandas.diff)
+def _diferenciada(valores, d):
+    for _ in range(d):
+        valores = np.diff(valores)
+    return valores[~np.isnan(valores)]
+
+# Autocorrelaciones hasta `lags` de las filas de X, centradas y rellenas con ceros a la derecha de
+# su largo: el relleno no aporta productos, así que series de distinto largo van en la misma FFT.
+# Autocovarianzas sesgadas (divididas por n), como statsmodels.tsa.stattools.acf.
+def _acf_fft(X, lags):
+    n_fft = fft.next_fast_len(2 * X.shape[1] - 1, real=True)  # sin solape circular
+    acf = np.empty((len(X), lags + 1))
+    for i in range(0, len(X), _FILAS_POR_BLOQUE):
+        espectro = fft.rfft(X[i:i + _FILAS_POR_BLOQUE], n=n_fft, axis=1)
+        acov = fft.irfft(espectro.real ** 2 + espectro.imag ** 2, n=n_fft, axis=1)[:, :lags + 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            acf[i:i + _FILAS_POR_BLOQUE] = acov / acov[:, :1]
+    return acf
+
+# PACF por la recursión de Durbin-Levinson sobre la ACF, para todas las filas a la vez; equivale a
+# Yule-Walker con autocovarianzas sesgadas (method='ywm' de plot_pacf)
+def _pacf_durbin_levinson(acf, lags):
+    pacf = np.empty_like(acf)
+    pacf[:, 0] = 1.0
+    phi = np.zeros_like(acf)  # phi[:, 1:k + 1]: coeficientes del AR(k)
+    varianza = np.ones(len(acf))  # varianza de la innovación del AR(k) / varianza de la serie
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for k in range(1, lags + 1):
+            phi_kk = (acf[:, k] - np.einsum('ij,ij->i', phi[:, 1:k], acf[:, k - 1:0:-1])) / varianza
+            phi[:, 1:k] -= phi_kk[:, None] * phi[:, k - 1:0:-1]
+            phi[:, k] = phi_kk
+            varianza = varianza * (1 - phi_kk ** 2)
+            pacf[:, k] = phi_kk
+    return pacf
+
+# Orden sugerido por el corte: rezagos consecutivos significativos desde el rezago 1, hasta max_orden
+# (la PACF de un AR(p) se corta después de p; la ACF de un MA(q), después de q)
+def _corte(valores, banda, max_orden):
+    significativos = np.abs(valores[:, 1:max_orden + 1]) > banda[:, 1:max_orden + 1]
+    return np.where(significativos.all(axis=1), significativos.shape[1], significativos.argmin(axis=1))
+
+# Correlogramas de las columnas de un panel (DataFrame o PanelPrecios) diferenciadas `d` veces (un
+# entero o {ticker: d}, p. ej. el d de adf_lote). Devuelve arrays (tickers x rezagos 0..lags):
+# acf y pacf, las semiamplitudes de sus bandas al nivel `alpha` (Bartlett para la ACF, 1/sqrt(n)
+# para la PACF, centradas en cero como en plot_acf/plot_pacf), el estadístico de Ljung-Box
+# acumulado hasta cada rezago y su p-valor, y los órdenes p y q sugeridos por el corte de la PACF y
+# de la ACF. Por ticker, los rezagos que la muestra no permite (ACF >= n, PACF >= n/2) quedan en NaN.
+@instrumentar()
+def correlograma_lote(panel, d=0, lags=40, alpha=0.05, max_orden=3):
+    tickers = list(panel.columns)
+    d = np.array([d.get(t, 0) for t in tickers] if isinstance(d, dict) else [d] * len(tickers), dtype=int)
+    series = [_diferenciada(panel[t].to_numpy(dtype=np.float64), k) for t, k in zip(tickers, d)]
+    nobs = np.array([len(s) for s in series])
+    X = np.zeros((len(tickers), max(nobs.max(initial=0), lags + 1)))
+    for i, s in enumerate(series):
+        if len(s):
+            X[i, :len(s)] = s - s.mean()
+
+    acf = _acf_fft(X, lags)
+    pacf = _pacf_durbin_levinson(acf, lags)
+    rezagos = np.arange(lags + 1)
+    n = nobs[:, None].astype(np.float64)
+    acf[rezagos >= n] = np.nan
+    pacf[(rezagos >= n // 2) & (rezagos > 0)] = np.nan
+
+    z = stats.norm.ppf(1 - alpha / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var_acf = np.zeros_like(acf)
+        var_acf[:, 1:2] = 1 / n
+        var_acf[:, 2:] = (1 + 2 * np.cumsum(np.nan_to_num(acf[:, 1:-1]) ** 2, axis=1)) / n
+        acf_banda = np.where(np.isnan(acf), np.nan, z * np.sqrt(var_acf))
+        pacf_banda = np.where(np.isnan(pacf), np.nan, np.where(rezagos > 0, z / np.sqrt(n), 0.0))
+        lb_stat = np.full_like(acf, np.nan)
+        lb_stat[:, 1:] = n * (n + 2) * np.cumsum(acf[:, 1:] ** 2 / (n - rezagos[1:]), axis=1)
+    lb_pvalue = np.full_like(acf, np.nan)
+    lb_pvalue[:, 1:] = stats.chi2.sf(lb_stat[:, 1:], rezagos[1:])
+
+    return {'tickers': tickers, 'lags': rezagos, 'd': d, 'nobs': nobs, 'alpha': alpha,
+            'acf': acf, 'acf_banda': acf_banda, 'pacf': pacf, 'pacf_banda': pacf_banda,
+            'lb_stat': lb_stat, 'lb_pvalue': lb_pvalue,
+            'p': _corte(pacf, pacf_banda, max_orden), 'q': _corte(acf, acf_banda, max_orden)}
+
+# Correlograma de un ticker (arrays 1-D con sus rezagos válidos), listo para plot_correlogram
+def correlograma_ticker(correlogramas, ticker):
+    i = correlogramas['tickers'].index(ticker)
+    validos = ~np.isnan(correlogramas['acf'][i])
+    out = {'ticker': ticker, 'lags': correlogramas['lags'][validos]}
+    for campo in ('acf', 'acf_banda', 'pacf', 'pacf_banda', 'lb_stat', 'lb_pvalue'):
+        out[campo] = correlogramas[campo][i][validos]
+    for campo in ('d', 'nobs', 'p', 'q'):
+        out[campo] = int(correlogramas[campo][i])
+    return out
+
+# Tabla por ticker: d, observaciones, (p, q) sugeridos y Ljung-Box en los rezagos `rezagos_lb`
+def tabla_correlograma(correlogramas, rezagos_lb=(10,)):
+    tabla = pd.DataFrame({'d': correlogramas['d'], 'nobs': correlogramas['nobs'], 'p_sugerido': correlogramas['p'],
+                          'q_sugerido': correlogramas['q']},
+                         index=pd.Index(correlogramas['tickers'], name='ticker'))
+    for k in rezagos_lb:
+        if k < len(correlogramas['lags']):
+            tabla[f'lb_stat_{k}'] = correlogramas['lb_stat'][:, k]
+            tabla[f'lb_pvalue_{k}'] = correlogramas['lb_pvalue'][:, k]
+    return tabla
+
+# Formato largo (una fila por ticker y rezago) para exportar los correlogramas completos
+def tabla_rezagos(correlogramas):
+    tickers, lags = correlogramas['tickers'], correlogramas['lags']
+    tabla = pd.DataFrame({'ticker': np.repeat(tickers, len(lags)), 'lag': np.tile(lags, len(tickers))})
+    for campo in ('acf', 'acf_banda', 'pacf', 'pacf_banda', 'lb_stat', 'lb_pvalue'):
+        tabla[campo] = correlogramas[campo].ravel()
+    return tabla.dropna(subset=['acf']).reset_index(drop=True)
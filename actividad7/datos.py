@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""Precios: caché local en Parquet, fuentes (Yahoo Finance o archivos locales) y descarga incremental en lotes."""
+
+import os
+import re
+import ast
+import json
+import logging
+import threading
+import numpy as np
+import pandas as pd
+
+from .perfil import instrumentar
+from .descarga import DescargaMasiva, TAMANO_LOTE, NO_EXISTE
+
+# Caché local de precios: un archivo Parquet por ticker más el rango de fechas ya cubierto
+CACHE_DIR = 'cache_precios'
+
+def _rutas_cache(ticker, cache_dir):
+    base = os.path.join(cache_dir, ticker.replace('/', '_'))
+    return base + '.parquet', base + '.json'
+
+# Rango de fechas guardado de un ticker, sin leer sus precios (None si no está en caché)
+def _leer_rango(ticker, cache_dir=CACHE_DIR):
+    ruta_datos, ruta_rango = _rutas_cache(ticker, cache_dir)
+    if not (os.path.exists(ruta_datos) and os.path.exists(ruta_rango)):
+        return None
+    with open(ruta_rango) as f:
+        rango = json.load(f)
+    return pd.Timestamp(rango['start']), pd.Timestamp(rango['end'])
+
+def leer_cache(ticker, cache_dir=CACHE_DIR):
+    rango = _leer_rango(ticker, cache_dir)
+    if rango is None:
+        return None, None
+    return pd.read_parquet(_rutas_cache(ticker, cache_dir)[0]), rango
+
+def guardar_cache(ticker, df, rango, cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    ruta_datos, ruta_rango = _rutas_cache(ticker, cache_dir)
+    df.to_parquet(ruta_datos)
+    with open(ruta_rango, 'w') as f:
+        json.dump({'start': rango[0].strftime('%Y-%m-%d'), 'end': rango[1].strftime('%Y-%m-%d')}, f)
+
+# Huecos [inicio, fin) que faltan para cubrir lo pedido a partir del rango ya guardado
+def rangos_faltantes(rango, start, end):
+    if rango is None:
+        return [(start, end)]
+    faltantes = []
+    if start < rango[0]:
+        faltantes.append((start, rango[0]))
+    if end > rango[1]:
+        faltantes.append((rango[1], end))
+    return faltantes
+
+# Separar el DataFrame ancho de yf.download en un DataFrame OHLCV por ticker
+def _separar_por_ticker(raw, tickers):
+    if raw is None or raw.empty:
+        return {}
+    if not isinstance(raw.columns, pd.MultiIndex):
+        return {tickers[0]: raw}
+    nivel = 1 if set(tickers) & set(raw.columns.get_level_values(1)) else 0
+    disponibles = set(raw.columns.get_level_values(nivel))
+    return {t: raw.xs(t, axis=1, level=nivel).dropna(how='all') for t in tickers if t in disponibles}
+
+# Fuentes de precios: reciben (tickers, start, end) y devuelven {ticker: DataFrame OHLCV}. Un
+# DataFrame vacío es una respuesta (no hay filas en el rango: fin de semana, feriado, fechas futuras)
+# y el rango queda cubierto; un ticker ausente es un fallo y se vuelve a pedir.
+_lock_yahoo = threading.Lock()
+
+# yf.download no lanza los errores por ticker: los escribe en el log 'yfinance' como
+# "['AAA', 'BBB']: <error>". Este handler los recoge durante una llamada.
+class _ErroresYahoo(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.errores = {}
+
+    def emit(self, record):
+        m = re.match(r"\s*(\[.*?\]): (.*)", record.getMessage(), re.S)
+        if m is None:
+            return
+        try:
+            tickers = ast.literal_eval(m.group(1))
+        except (ValueError, SyntaxError):
+            return
+        for ticker in tickers:
+            self.errores[ticker] = m.group(2)
+
+# Sin filas en el rango, Yahoo contesta "no price data found" y eso es una respuesta vacía; cualquier
+# otro error (red, límite de tasa, status_code de Yahoo) deja el ticker fuera para reintentarlo.
+# Las llamadas concurrentes se serializan para no mezclar los errores capturados de cada una;
+# dentro de cada lote yfinance ya reparte los tickers en sus propios hilos.
+@instrumentar('yf.download')
+def fuente_yahoo(tickers, start, end, timeout=10):
+    import yfinance as yf
+    capturados = _ErroresYahoo()
+    logger = logging.getLogger('yfinance')
+    with _lock_yahoo:
+        logger.addHandler(capturados)
+        try:
+            raw = yf.download(tickers, start=start, end=end, timeout=timeout, progress=False)
+        finally:
+            logger.removeHandler(capturados)
+    out = _separar_por_ticker(raw, tickers)
+    for ticker in tickers:
+        if ticker in out and not out[ticker].empty:
+            continue
+        error = capturados.errores.get(ticker.upper())
+        if error is None or ('no price data found' in error and 'status_code' not in error):
+            out[ticker] = pd.DataFrame(index=pd.DatetimeIndex([], name='Date'))
+        else:
+            out.pop(ticker, None)
+    return out
+
+# Fuente sin red: lee <directorio>/<ticker>.parquet o <directorio>/<ticker>.csv. Un ticker sin
+# archivo no va a aparecer en un reintento: se marca NO_EXISTE y falla sin reintentos ni espera.
+def fuente_local(directorio):
+    def fuente(tickers, start, end):
+        out = {}
+        for ticker in tickers:
+            ruta = os.path.join(directorio, ticker)
+            if os.path.exists(ruta + '.parquet'):
+                df = pd.read_parquet(ruta + '.parquet')
+            elif os.path.exists(ruta + '.csv'):
+                df = pd.read_csv(ruta + '.csv', index_col=0, parse_dates=True)
+            else:
+                out[ticker] = NO_EXISTE
+                continue
+            out[ticker] = df.loc[(df.index >= start) & (df.index < end)]
+        return out
+    return fuente
+
+# DataFrame ancho (Price, Ticker) de los tickers dados, recortado a [start, end)
+def _apilar(frames, start, end):
+    frames = {t: df.loc[(df.index >= start) & (df.index < end)] for t, df in frames.items() if df is not None}
+    frames = {t: df for t, df in frames.items() if not df.empty}
+    if not frames:
+        return pd.DataFrame()
+    data = pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+    data.columns.names = ['Price', 'Ticker']
+    return data
+
+# Los precios de Yahoo vienen ajustados por dividendos y splits hasta el día de la descarga, así que
+# un dividendo posterior cambia toda la historia anterior. Cada hueco se pide con _SOLAPE de barras
+# ya guardadas a su lado: si esos cierres no coinciden con los de la caché, el ajuste cambió y la
+# historia completa del ticker se vuelve a pedir en lugar de empalmar dos bases distintas.
+_SOLAPE = pd.Timedelta(days=10)
+_COLUMNAS_AJUSTADAS = ('Close', 'Adj Close')
+
+def _empalma(df, df_nuevo):
+    if df is None or df.empty or df_nuevo.empty:
+        return True
+    comunes = df.index.intersection(df_nuevo.index)
+    columnas = [c for c in _COLUMNAS_AJUSTADAS if c in df.columns and c in df_nuevo.columns]
+    if not len(comunes) or not columnas:
+        return True
+    return np.allclose(df.loc[comunes, columnas].to_numpy(dtype=np.float64),
+                       df_nuevo.loc[comunes, columnas].to_numpy(dtype=np.float64), rtol=1e-6, equal_nan=True)
+
+# Rango que se pide a la fuente para un hueco: el hueco más _SOLAPE del lado de lo ya guardado
+def _con_solape(hueco, start, end):
+    s, e = hueco
+    if s == start and e != end:
+        return s, e + _SOLAPE  # hueco antes de la historia guardada
+    if e == end and s != start:
+        return s - _SOLAPE, e  # hueco después de la historia guardada
+    return s, e
+
+# Recorrido de la descarga incremental: lee de la caché el rango ya cubierto y solo pide a la fuente
+# los huecos (con su solape). Los tickers con el mismo hueco se piden con DescargaMasiva (lotes
+# concurrentes, límite de tasa y reintentos solo de los que fallan; `opciones` son sus parámetros).
+# Entrega por grupos {ticker: DataFrame OHLCV} de los tickers ya completos: primero los que la caché
+# ya cubría, en grupos del tamaño de lote, después cada lote que llega de la fuente y al final los
+# que se volvieron a pedir completos porque cambió su ajuste. Los precios de cada ticker se leen de
+# la caché al entregarlo o al completarlo con lo descargado (y se guardan en ese momento), así que en
+# memoria solo está el grupo en curso. Al terminar avisa de los tickers que fallaron.
+def _descarga_por_grupos(tickers, start, end, cache_dir, source, **opciones):
+    source = source or fuente_yahoo
+    rangos = {t: _leer_rango(t, cache_dir) for t in dict.fromkeys(tickers)}
+
+    # Agrupar los tickers con el mismo hueco para pedirlos juntos; un hueco que empieza después de
+    # hoy no puede tener datos y no se pide
+    hoy = pd.Timestamp.today().normalize()
+    pendientes, huecos = {}, {}
+    for ticker, rango in rangos.items():
+        for hueco in rangos_faltantes(rango, start, end):
+            if hueco[0] > hoy:
+                continue
+            pendientes.setdefault(hueco, []).append(ticker)
+            huecos[ticker] = huecos.get(ticker, 0) + 1
+
+    def de_cache(listos):
+        grupo = {t: leer_cache(t, cache_dir)[0] for t in listos}
+        return {t: df for t, df in grupo.items() if df is not None}
+
+    def descargar(grupo, s, e):
+        return DescargaMasiva(source, grupo, s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d'), **opciones)
+
+    cubiertos = [t for t in rangos if t not in huecos]
+    tamano = opciones.get('tamano_lote') or TAMANO_LOTE
+    for i in range(0, len(cubiertos), tamano):
+        yield de_cache(cubiertos[i:i + tamano])
+
+    fallidos, refrescar = {}, {}
+    for (s, e), grupo in pendientes.items():
+        descarga = descargar(grupo, *_con_solape((s, e), start, end))
+        for nuevos in descarga:
+            listos = {}
+            for ticker, df_nuevo in nuevos.items():
+                huecos[ticker] -= 1
+                if ticker in refrescar:
+                    continue
+                df, rango = leer_cache(ticker, cache_dir)
+                if not _empalma(df, df_nuevo):
+                    # Historia completa: lo guardado más lo pedido
+                    refrescar[ticker] = (min(rango[0], start), max(rango[1], end))
+                    continue
+                # Una respuesta vacía no agrega filas, pero el hueco sí queda cubierto
+                if df is None or df.empty:
+                    df = df_nuevo
+                elif not df_nuevo.empty:
+                    df = pd.concat([df, df_nuevo])
+                    df = df[~df.index.duplicated(keep='last')].sort_index()
+                # No dar por cubiertas fechas futuras, que todavía no tienen datos
+                e_cubierto = min(e, max(hoy, s))
+                rango = (s, e_cubierto) if rango is None else (min(rango[0], s), max(rango[1], e_cubierto))
+                guardar_cache(ticker, df, rango, cache_dir)
+                if huecos[ticker] == 0:
+                    listos[ticker] = df
+            yield listos
+        # Los que fallaron no se marcan como cubiertos: se vuelven a pedir en la siguiente corrida
+        for ticker in descarga.fallidos:
+            huecos[ticker] -= 1
+        fallidos.update(descarga.errores)
+        yield de_cache([t for t in descarga.fallidos if huecos[t] == 0 and t not in refrescar])
+
+    # Tickers cuyo ajuste cambió: la historia nueva reemplaza a la guardada. Si no llega, se entrega
+    # la guardada, sin marcar el hueco como cubierto
+    por_rango = {}
+    for ticker, rango in refrescar.items():
+        por_rango.setdefault(rango, []).append(ticker)
+    for (s, e), grupo in por_rango.items():
+        descarga = descargar(grupo, s, e)
+        for nuevos in descarga:
+            for ticker, df in nuevos.items():
+                guardar_cache(ticker, df, (s, min(e, max(hoy, s))), cache_dir)
+            yield nuevos
+        fallidos.update(descarga.errores)
+        yield de_cache(descarga.fallidos)
+
+    if fallidos:
+        nombres = ', '.join(list(fallidos)[:10]) + (', ...' if len(fallidos) > 10 else '')
+        print(f"Download failed for {len(fallidos)} tickers ({nombres}); last error: {list(fallidos.values())[-1]}")
+
+# Descarga incremental (ver _descarga_por_grupos): devuelve el DataFrame ancho (Price, Ticker) de todo
+# el universo. Con `al_llegar`, cada grupo de tickers ya completos se entrega como DataFrame ancho
+# mientras se descarga el resto (primero los que la caché ya cubría).
+@instrumentar()
+def descarga_incremental(tickers, start_date, end_date, cache_dir=CACHE_DIR, source=None, al_llegar=None,
+                         **opciones):
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    lotes = []
+    for grupo in _descarga_por_grupos(tickers, start, end, cache_dir, source, **opciones):
+        lote = _apilar(grupo, start, end)
+        if not lote.empty:
+            lotes.append(lote)
+            if al_llegar is not None:
+                al_llegar(lote)
+    if not lotes:
+        return pd.DataFrame()
+    return pd.concat(lotes, axis=1).sort_index().sort_index(axis=1)
+
+# Aviso de los tickers pedidos que no tienen datos
+def _avisar_faltantes(tickers, obtenidos):
+    faltantes = [t for t in tickers if t not in obtenidos]
+    if faltantes:
+        print(f"No data for {len(faltantes)} of {len(tickers)} tickers: {', '.join(faltantes)}")
+
+# Descargar datos (vía caché). Cada ticker se intenta hasta `retries` veces (solo se repiten los que
+# fallan); si faltan tickers se avisa y se devuelve lo obtenido.
+@instrumentar()
+def fetch_data(tickers, start_date, end_date, retries=3, cache_dir=CACHE_DIR, source=None, al_llegar=None,
+               **opciones):
+    try:
+        data = descarga_incremental(tickers, start_date, end_date, cache_dir=cache_dir, source=source,
+                                    al_llegar=al_llegar, intentos=retries, **opciones)
+    except Exception as e:
+        print(f"Download failed: {e}")
+        return None
+    if data.empty:
+        print("No data retrieved.")
+        return None
+    _avisar_faltantes(tickers, set(data.columns.get_level_values('Ticker')))
+    return data
+
+# Como fetch_data, pero directo a un PanelPrecios de precios (`campo`; por defecto el cierre ajustado
+# o el de cierre) sin armar el DataFrame OHLCV de todo el universo: de cada grupo que llega solo se
+# guarda la serie de precios de cada ticker. `al_llegar` recibe, como en fetch_data, el DataFrame
+# ancho de cada grupo; `dtype` y `ruta` son los de PanelPrecios.desde_frame.
+@instrumentar()
+def fetch_panel(tickers, start_date, end_date, retries=3, cache_dir=CACHE_DIR, source=None, al_llegar=None,
+                campo=None, dtype=np.float64, ruta=None, **opciones):
+    from .panel import ConstructorPanel
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    constructor = ConstructorPanel(campo=campo, dtype=dtype)
+    try:
+        for grupo in _descarga_por_grupos(tickers, start, end, cache_dir, source, intentos=retries, **opciones):
+            grupo = {t: df.loc[(df.index >= start) & (df.index < end)] for t, df in grupo.items()}
+            grupo = {t: df for t, df in grupo.items() if not df.empty}
+            if al_llegar is not None and grupo:
+                al_llegar(_apilar(grupo, start, end))
+            for ticker, df in grupo.items():
+                constructor.agregar(ticker, df)
+    except Exception as e:
+        print(f"Download failed: {e}")
+        return None
+    if not len(constructor):
+        print("No data retrieved.")
+        return None
+    _avisar_faltantes(tickers, constructor)
+    return constructor.panel(ruta=ruta)
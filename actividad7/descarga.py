@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Descarga masiva de precios: el universo se parte en lotes que se piden en paralelo a la fuente.
+
+Un pool de hilos pide los lotes bajo un límite de tasa común; si un lote falla o llega con tickers
+de menos, solo esos tickers se vuelven a pedir, con espera exponencial. Cada lote se entrega al
+consumidor en cuanto llega, sin esperar al resto del universo.
+
+`fuente_http` lee CSV por HTTP desde <url>/<ticker>.csv; para probar sin red basta un servidor local
+sobre un directorio de CSV:
+
+    python -m http.server 8000 --directory precios/
+    python -m actividad7 --source-url http://127.0.0.1:8000 --chunk-size 2 --concurrency 4
+"""
+
+import io
+import time
+import random
+import threading
+import http.client
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+
+from .perfil import instrumentar
+
+# Valores por defecto de la descarga; MAX_POR_SEGUNDO=None no limita la tasa
+TAMANO_LOTE = 50
+MAX_CONCURRENCIA = 4
+MAX_POR_SEGUNDO = None
+INTENTOS = 3
+BACKOFF_S = 1.0
+BACKOFF_MAX_S = 30.0
+
+# Valor que una fuente pone en un ticker que no tiene y que no va a tener en un reintento (p. ej. un
+# archivo local que no existe): el ticker queda en `fallidos` sin reintentos ni espera
+NO_EXISTE = object()
+
+
+# Límite de tasa compartido por los hilos del pool: cada petición reserva el siguiente turno libre
+# y espera hasta él; una petición de `n` tickers ocupa n turnos
+class LimiteTasa:
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo
+        self._siguiente = time.monotonic()
+        self._lock = threading.Lock()
+
+    def esperar(self, n=1):
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(self._siguiente, ahora)
+            self._siguiente = turno + n * self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+# Descarga de `tickers` en lotes de `tamano_lote` con hasta `max_concurrencia` peticiones en vuelo.
+# Al iterarla entrega {ticker: DataFrame OHLCV} de cada petición según terminan; un DataFrame vacío
+# es una respuesta válida (la fuente no tiene filas en el rango) y no se reintenta. Los tickers que
+# fallan (excepción o ausentes del resultado) se vuelven a pedir juntos hasta `intentos` veces en total,
+# tras backoff * 2**intento segundos (con jitter); los que se agotan, o que la fuente marca con
+# NO_EXISTE, quedan en `fallidos` y el último error de cada uno en `errores`.
+class DescargaMasiva:
+    def __init__(self, source, tickers, start, end, tamano_lote=None, max_concurrencia=None,
+                 max_por_segundo=None, intentos=None, backoff=None):
+        self.source = source
+        self.tickers = list(dict.fromkeys(tickers))
+        self.start, self.end = start, end
+        self.tamano_lote = tamano_lote or TAMANO_LOTE
+        self.max_concurrencia = max_concurrencia or MAX_CONCURRENCIA
+        self.intentos = intentos or INTENTOS
+        self.backoff = BACKOFF_S if backoff is None else backoff
+        max_por_segundo = max_por_segundo or MAX_POR_SEGUNDO
+        self.limite = LimiteTasa(max_por_segundo) if max_por_segundo else None
+        self.fallidos = []
+        self.errores = {}
+
+    def lotes(self):
+        return [self.tickers[i:i + self.tamano_lote] for i in range(0, len(self.tickers), self.tamano_lote)]
+
+    def _pedir(self, lote, espera):
+        if espera > 0:
+            time.sleep(espera)
+        if self.limite is not None:
+            self.limite.esperar(len(lote))
+        return self.source(lote, self.start, self.end)
+
+    def _espera(self, intento):
+        return min(BACKOFF_MAX_S, self.backoff * 2 ** intento) * random.uniform(0.5, 1.0)
+
+    def __iter__(self):
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrencia)
+        try:
+            en_vuelo = {executor.submit(self._pedir, lote, 0): (lote, 1) for lote in self.lotes()}
+            while en_vuelo:
+                terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    lote, intento = en_vuelo.pop(futuro)
+                    try:
+                        recibidos = futuro.result() or {}
+                        error = 'sin respuesta de la fuente'
+                    except Exception as e:
+                        recibidos, error = {}, repr(e)
+                    definitivos = [t for t in lote if recibidos.get(t) is NO_EXISTE]
+                    if definitivos:
+                        self.fallidos.extend(definitivos)
+                        self.errores.update(dict.fromkeys(definitivos, 'no existe en la fuente'))
+                    nuevos = {t: recibidos[t] for t in lote
+                              if recibidos.get(t) is not None and recibidos[t] is not NO_EXISTE}
+                    faltan = [t for t in lote if t not in nuevos and t not in definitivos]
+                    if faltan and intento < self.intentos:
+                        en_vuelo[executor.submit(self._pedir, faltan, self._espera(intento))] = (faltan, intento + 1)
+                    else:
+                        self.fallidos.extend(faltan)
+                        self.errores.update(dict.fromkeys(faltan, error))
+                    if nuevos:
+                        yield nuevos
+        finally:
+            # Si el consumidor deja de iterar, los lotes pendientes se cancelan
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Conexión HTTP persistente por hilo: el pool de hilos de DescargaMasiva es el pool de conexiones
+_conexiones = threading.local()
+
+def _conexion(url, timeout):
+    clave = (url.scheme, url.netloc)
+    conexiones = _conexiones.__dict__.setdefault('por_host', {})
+    if clave not in conexiones:
+        clase = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        conexiones[clave] = clase(url.netloc, timeout=timeout)
+    return conexiones[clave]
+
+def _get(url, timeout):
+    partes = urllib.parse.urlsplit(url)
+    ruta = partes.path + ('?' + partes.query if partes.query else '')
+    conexion = _conexion(partes, timeout)
+    try:
+        conexion.request('GET', ruta)
+        respuesta = conexion.getresponse()
+        cuerpo = respuesta.read()
+    except (http.client.HTTPException, OSError):
+        # Conexión caída (p. ej. el servidor cerró el keep-alive): se reabre una vez
+        conexion.close()
+        conexion.request('GET', ruta)
+        respuesta = conexion.getresponse()
+        cuerpo = respuesta.read()
+    return respuesta.status, cuerpo
+
+# Fuente HTTP: GET <url_base>/<ticker>.csv?start=...&end=... con un CSV OHLCV indexado por fecha.
+# El rango se vuelve a recortar aquí, así que un servidor estático que ignora la consulta sirve igual.
+# Un ticker con error o respuesta distinta de 200 queda fuera del resultado (y se reintenta); uno sin
+# filas en el rango devuelve un DataFrame vacío.
+def fuente_http(url_base, timeout=10):
+    url_base = url_base.rstrip('/')
+
+    @instrumentar('http.download')
+    def fuente(tickers, start, end):
+        out = {}
+        for ticker in tickers:
+            consulta = urllib.parse.urlencode({'start': start, 'end': end})
+            url = f"{url_base}/{urllib.parse.quote(ticker)}.csv?{consulta}"
+            try:
+                estado, cuerpo = _get(url, timeout)
+                if estado != 200:
+                    continue
+                df = pd.read_csv(io.BytesIO(cuerpo), index_col=0, parse_dates=True)
+            except Exception:
+                continue
+            out[ticker] = df.loc[(df.index >= start) & (df.index < end)]
+        return out
+    return fuente
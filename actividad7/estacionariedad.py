@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""Raíz unitaria: test ADF, diferenciación hasta estacionariedad y ADF en lote para un panel."""
+
+import hashlib
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.stattools import adfuller
+from statsmodels.tsa.adfvalues import mackinnonp, mackinnoncrit
+
+from .perfil import instrumentar
+from .cache_resultados import cache_activa, clave, leer, guardar, memoizar
+
+# adfuller memoizado: la clave solo depende de los valores (no de las fechas) y de autolag
+def _adfuller(series, autolag='AIC'):
+    valores = np.asarray(series, dtype=np.float64)
+    return memoizar('adfuller', valores, {'autolag': autolag}, lambda: adfuller(valores, autolag=autolag))
+
+# Test de Dickey-Fuller Aumentado
+@instrumentar()
+def adf_test(series, title='', verbose=True, result=None):
+    if result is None:
+        result = _adfuller(series.dropna())
+    if not verbose:
+        return result
+    print(f'Augmented Dickey-Fuller Test: {title}')
+    labels = ['ADF Test Statistic', 'p-value', '# Lags Used', 'Number of Observations Used']
+    out = pd.Series(result[0:4], index=labels)
+    for key, value in result[4].items():
+        out[f'Critical Value ({key})'] = value
+    print(out.to_string())
+    if result[1] <= 0.05:
+        print("→ Serie estacionaria (se rechaza H0)\n")
+    else:
+        print("→ Serie NO estacionaria (no se rechaza H0)\n")
+    return result
+
+# Aplicar diferenciación hasta volver estacionaria la serie
+@instrumentar()
+def make_stationary(series, max_diff=2, verbose=True, adf_results=None):
+    d = 0
+    temp_series = series.copy()
+    while d <= max_diff:
+        if adf_results is not None and d in adf_results:
+            result = adf_results[d]
+        else:
+            result = _adfuller(temp_series.dropna())
+        p_value = result[1]
+        if p_value <= 0.05:
+            if verbose:
+                print(f"✔ Serie estacionaria tras {d} diferenciación(es).")
+            return temp_series, d
+        else:
+            temp_series = temp_series.diff()
+            d += 1
+    if verbose:
+        print("✘ No se logró estacionar la serie con el número máximo de diferenciaciones.")
+    return temp_series, d
+
+# Memoria por bloque del ADF en lote: los regresores, la matriz de diseño y la Q de su QR ocupan
+# cada uno filas x nobs x (maxlag + 2) números, así que las series se procesan en bloques de filas
+# que caben en este presupuesto (como _FILAS_POR_BLOQUE en correlograma)
+_MB_POR_BLOQUE = 64
+
+def _filas_por_bloque(T):
+    maxlag = max(0, int(np.ceil(12.0 * np.power(T / 100.0, 1 / 4.0))))
+    por_fila = 4 * 8 * T * (maxlag + 2)  # regresores, diseño, Q y temporales de la QR
+    return max(1, int(_MB_POR_BLOQUE * 2 ** 20 // por_fila))
+
+# Regresores del ADF para todas las series a la vez: columnas [nivel, rezagos 1..lags]
+def _regresores_adf(X, xdiff, lags):
+    T = X.shape[1]
+    nobs = T - 1 - lags
+    regresores = np.empty((X.shape[0], nobs, lags + 1))
+    regresores[:, :, 0] = X[:, lags:T - 1]
+    for j in range(1, lags + 1):
+        regresores[:, :, j] = xdiff[:, lags - j:T - 1 - j]
+    return regresores, xdiff[:, lags:]
+
+# ADF (regresión 'c', autolag='AIC') de N series de igual longitud T con mínimos cuadrados apilados.
+# Reproduce la búsqueda de rezagos de adfuller: todas las regresiones anidadas comparten
+# muestra, así que una sola QR por serie da el SSR (y el AIC) de cada número de rezagos.
+def _adf_lote_matriz(X):
+    N, T = X.shape
+    maxlag = min(T // 2 - 2, int(np.ceil(12.0 * np.power(T / 100.0, 1 / 4.0))))
+    if maxlag < 0:
+        raise ValueError("sample size is too short to use selected regression component")
+    xdiff = np.diff(X, axis=1)
+
+    regresores, y = _regresores_adf(X, xdiff, maxlag)
+    nobs = y.shape[1]
+    completo = np.concatenate([np.ones((N, nobs, 1)), regresores], axis=2)  # [const, nivel, rezagos]
+    Q, _ = np.linalg.qr(completo)
+    qy = np.einsum('nik,ni->nk', Q, y)
+    ssr = np.einsum('ni,ni->n', y, y)[:, None] - np.cumsum(qy ** 2, axis=1)
+    k = np.arange(1, maxlag + 3)
+    aic = nobs * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1) + 2 * k
+    aic = aic[:, 1:]  # al menos constante y nivel
+    lags = np.argmin(aic, axis=1)
+    icbest = aic[np.arange(N), lags]
+
+    # Regresión final con el rezago elegido, agrupando las series que eligieron el mismo
+    resultados = [None] * N
+    for lag in np.unique(lags):
+        idx = np.flatnonzero(lags == lag)
+        regresores, y = _regresores_adf(X[idx], xdiff[idx], lag)
+        n, nobs_lag = len(idx), y.shape[1]
+        diseno = np.concatenate([regresores, np.ones((n, nobs_lag, 1))], axis=2)
+        Q, R = np.linalg.qr(diseno)
+        coef = np.linalg.solve(R, np.einsum('nik,ni->nk', Q, y)[:, :, None])[:, :, 0]
+        resid = y - np.einsum('nik,nk->ni', diseno, coef)
+        sigma2 = np.einsum('ni,ni->n', resid, resid) / (nobs_lag - diseno.shape[2])
+        var_nivel = sigma2 * np.sum(np.linalg.inv(R)[:, 0, :] ** 2, axis=1)
+        stats = coef[:, 0] / np.sqrt(var_nivel)
+        crit = mackinnoncrit(N=1, regression='c', nobs=nobs_lag)
+        critvalues = {'1%': crit[0], '5%': crit[1], '10%': crit[2]}
+        for i, stat in zip(idx, stats):
+            resultados[i] = (float(stat), mackinnonp(stat, regression='c', N=1), int(lag),
+                             nobs_lag, dict(critvalues), icbest[i])
+    return resultados
+
+# Valores de una columna del panel sin los NaN del principio y del final (fechas en las que el
+# ticker no cotiza); los huecos intermedios se conservan porque cambian las diferencias
+def _valores_recortados(serie):
+    valores = serie.to_numpy(dtype=np.float64)
+    validos = np.flatnonzero(~np.isnan(valores))
+    return valores[validos[0]:validos[-1] + 1] if len(validos) else valores[:0]
+
+# Huella de lo que adf_lote usa de una columna: dos columnas con la misma huella dan el mismo resultado
+def huella_adf(serie):
+    return hashlib.sha1(_valores_recortados(serie).tobytes()).hexdigest()
+
+# Tests ADF de todo un panel y de sus diferencias, en lote.
+# Para cada ticker prueba d = 0, 1, ... y se detiene en el primer orden estacionario, igual que
+# make_stationary (incluye el orden max_diff + 1 si no se logra). Devuelve {ticker: {d: resultado}},
+# con resultados en el mismo formato que adfuller, listos para make_stationary y adf_test.
+# Los tickers cuya serie no cambió desde la última corrida salen de la caché de resultados; el
+# lote solo incluye los demás.
+@instrumentar()
+def adf_lote(panel, max_diff=2):
+    if not cache_activa():
+        return _adf_lote_calcular(panel, max_diff)
+    claves = {ticker: clave('adf_lote', _valores_recortados(panel[ticker]), {'max_diff': max_diff})
+              for ticker in panel.columns}
+    resultados, faltantes = {}, []
+    for ticker, k in claves.items():
+        encontrado, valor = leer(k)
+        if encontrado:
+            resultados[ticker] = valor
+        else:
+            faltantes.append(ticker)
+    if faltantes:
+        nuevos = _adf_lote_calcular(panel[faltantes], max_diff)
+        for ticker in faltantes:
+            guardar(claves[ticker], nuevos[ticker])
+        resultados.update(nuevos)
+    return {ticker: resultados[ticker] for ticker in panel.columns}
+
+# Trabaja columna a columna (vistas del panel, sin copiarlo): la diferencia de orden d de cada
+# ticker pendiente se calcula con np.diff, que deja los huecos igual que pandas.diff + dropna. Las
+# series de igual longitud se apilan en bloques de _filas_por_bloque filas.
+def _adf_lote_calcular(panel, max_diff):
+    resultados = {ticker: {} for ticker in panel.columns}
+    series = {ticker: panel[ticker].to_numpy(dtype=np.float64) for ticker in panel.columns}
+    for d in range(max_diff + 2):
+        # Agrupar por longitud para apilar series sin NaN en una sola matriz
+        grupos = {}
+        for ticker, serie in series.items():
+            valores = serie[~np.isnan(serie)]
+            if len(valores) and valores.max() != valores.min():
+                grupos.setdefault(len(valores), []).append((ticker, valores))
+        for largo, grupo in grupos.items():
+            filas = _filas_por_bloque(largo)
+            for i in range(0, len(grupo), filas):
+                bloque = grupo[i:i + filas]
+                try:
+                    res = _adf_lote_matriz(np.vstack([valores for _, valores in bloque]))
+                except ValueError:
+                    break  # serie demasiado corta: adf_test/make_stationary lo reportarán como siempre
+                for (ticker, _), r in zip(bloque, res):
+                    resultados[ticker][d] = r
+        pendientes = [t for t in series if d in resultados[t] and resultados[t][d][1] > 0.05]
+        if not pendientes or d > max_diff:
+            break
+        series = {ticker: np.diff(series[ticker]) for ticker in pendientes}
+    return resultados
+
+# Orden de diferenciación que elige make_stationary a partir de los resultados de adf_lote de un
+# ticker: el primer d estacionario o, si no hay ninguno, el último probado
+def orden_diferenciacion(adf_resultados):
+    if not adf_resultados:
+        return 0
+    return min((d for d, r in adf_resultados.items() if r[1] <= 0.05), default=max(adf_resultados))
+
+# Tabla por ticker a partir de adf_lote: ADF de la serie original y del primer orden estacionario
+# (mismas columnas que analizar_ticker, para trabajos que solo necesitan la etapa ADF)
+def tabla_adf(adf_resultados):
+    filas = []
+    for ticker, res in adf_resultados.items():
+        fila = {'ticker': ticker}
+        if res:
+            d = orden_diferenciacion(res)
+            fila.update({
+                'adf_stat': res[0][0],
+                'adf_pvalue': res[0][1],
+                'adf_lags': res[0][2],
+                'd': d,
+                'adf_stat_diff': res[d][0],
+                'adf_pvalue_diff': res[d][1],
+            })
+        filas.append(fila)
+    return pd.DataFrame(filas).set_index('ticker')
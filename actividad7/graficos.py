@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""Figuras. Importar este módulo carga matplotlib, así que el resto del paquete lo importa solo
+cuando hay figuras que generar."""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import matplotlib
+
+from . import salidas
+if salidas.HEADLESS:
+    matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+
+from .perfil import instrumentar
+from .salidas import graficar
+from .correlograma import correlograma_lote, correlograma_ticker
+from .indicadores import moving_average
+from .simulacion import simular_caminatas
+
+# Figuras: en modo interactivo se muestran; en modo batch se cierran en el hilo principal y
+# un pool de hilos las renderiza a PNG mientras el análisis sigue
+_pool_figuras = None
+_figuras_pendientes = []
+
+def mostrar_figura(nombre, fig=None, output_dir=None):
+    global _pool_figuras
+    fig = fig or plt.gcf()
+    if not salidas.HEADLESS:
+        plt.show()
+        return
+    plt.close(fig)
+    if not salidas.GUARDAR_FIGURAS:
+        return
+    carpeta = os.path.join(output_dir or salidas.OUTPUT_DIR, 'figuras')
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = os.path.join(carpeta, re.sub(r'[^\w.-]+', '_', nombre).strip('_') + '.png')
+    if _pool_figuras is None:
+        _pool_figuras = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+    _figuras_pendientes.append(_pool_figuras.submit(fig.savefig, ruta))
+
+# Esperar a que terminen de escribirse las figuras en segundo plano
+def esperar_figuras():
+    global _pool_figuras
+    pendientes = list(_figuras_pendientes)
+    _figuras_pendientes.clear()
+    for futuro in pendientes:
+        futuro.result()
+    if _pool_figuras is not None:
+        _pool_figuras.shutdown()
+        _pool_figuras = None
+
+# Barras de un correlograma con su banda de confianza centrada en cero (como plot_acf/plot_pacf)
+def _barras_correlacion(ax, lags, valores, banda, titulo):
+    validos = ~np.isnan(valores)
+    lags, valores, banda = lags[validos], valores[validos], banda[validos]
+    ax.vlines(lags, 0, valores)
+    ax.axhline(0)
+    ax.plot(lags, valores, marker='o', markersize=5, linestyle='None')
+    bordes = lags[1:].astype(float)
+    if len(bordes):
+        bordes[0] -= 0.5
+        bordes[-1] += 0.5
+        ax.fill_between(bordes, -banda[1:], banda[1:], alpha=0.25)
+    ax.margins(0.05)
+    ax.set_ylim(-1, 1)
+    ax.set_title(titulo)
+
+# Correlograma ACF y PACF. Dibuja el resultado de correlograma_ticker si se pasa en `correlograma`;
+# si no, lo calcula para esta serie (ya diferenciada)
+@instrumentar()
+def plot_correlogram(series, lags=40, title='', correlograma=None):
+    if not graficar():
+        return
+    if correlograma is None:
+        correlograma = correlograma_ticker(correlograma_lote(series.to_frame('serie'), lags=lags), 'serie')
+    plt.figure(figsize=(14, 5))
+    _barras_correlacion(plt.subplot(121), correlograma['lags'], correlograma['acf'], correlograma['acf_banda'],
+                        f'ACF - {title}')
+    _barras_correlacion(plt.subplot(122), correlograma['lags'], correlograma['pacf'], correlograma['pacf_banda'],
+                        f'PACF - {title}')
+    plt.tight_layout()
+    mostrar_figura(f'correlograma {title}')
+
+# Simulación de caminata aleatoria: precio real frente a las bandas de la simulación Monte Carlo
+@instrumentar()
+def plot_random_walk(stock_data, ticker, n_paths=10000, modelo='rw'):
+    if not graficar():
+        return
+    bandas = simular_caminatas(stock_data, n_paths=n_paths, modelo=modelo)['bandas']
+    plt.figure(figsize=(14, 7))
+    plt.fill_between(bandas.index, bandas['p5'], bandas['p95'], color='red', alpha=0.15, label='Random Walk 5%-95%')
+    plt.fill_between(bandas.index, bandas['p25'], bandas['p75'], color='red', alpha=0.3, label='Random Walk 25%-75%')
+    plt.plot(bandas['p50'], label='Simulated Random Walk (mediana)', color='red', linestyle='--')
+    plt.plot(stock_data, label='Actual Adjusted Close Prices', color='black')
+    plt.title(f'{ticker} - Actual Prices vs. Simulated Random Walk ({n_paths} caminos)')
+    plt.xlabel('Date')
+    plt.ylabel('Price')
+    plt.legend()
+    mostrar_figura(f'{ticker} random walk')
+
+# Precios y medias móviles
+@instrumentar()
+def plot_moving_averages(stock_data, ticker, ma_9, ma_30):
+    if not graficar():
+        return
+    plt.figure(figsize=(14, 7))
+    plt.plot(stock_data, label='Precios Ajustados')
+    plt.plot(ma_9, label='Media móvil 9 días')
+    plt.plot(ma_30, label='Media móvil 30 días')
+    plt.title(f'{ticker} - Precios y Medias Móviles')
+    plt.legend()
+    mostrar_figura(f'{ticker} medias moviles')
+
+# Precio histórico y pronóstico ARIMA reintegrado
+@instrumentar()
+def plot_forecast(series, forecast_series, ticker, d):
+    if not graficar():
+        return
+    plt.figure(figsize=(14, 7))
+    plt.plot(series, label='Precio Histórico')
+    plt.plot(forecast_series, label='Pronóstico ARIMA (Reintegrado)', color='red')
+    plt.title(f'{ticker} - ARIMA Forecast con diferenciación (d={d})')
+    plt.xlabel('Fecha')
+    plt.ylabel('Precio')
+    plt.legend()
+    mostrar_figura(f'{ticker} forecast arima')
+
+# Figuras de un ticker a partir de los resultados estructurados de analizar_ticker o tabla_adf (y, si
+# ya se calculó, de su correlograma_ticker). Solo se dibujan las etapas de `etapas` (None = todas);
+# random_walk y medias_moviles no necesitan `fila`.
+def graficar_ticker(stock_data, ticker, fila, correlograma=None, etapas=None):
+    etapas = {'random_walk', 'correlograma', 'medias_moviles', 'arima'} if etapas is None else set(etapas)
+    if 'random_walk' in etapas:
+        plot_random_walk(stock_data, ticker)
+    if 'correlograma' in etapas and fila is not None:
+        d = int(fila['d'])
+        stationary_series = stock_data
+        for _ in range(d):
+            stationary_series = stationary_series.diff()
+        plot_correlogram(stationary_series, title=f'{ticker} - Serie estacionaria (d={d})', correlograma=correlograma)
+    if 'medias_moviles' in etapas:
+        plot_moving_averages(stock_data, ticker, moving_average(stock_data, 9), moving_average(stock_data, 30))
+    if 'arima' in etapas and fila is not None and fila.get('forecast') is not None:
+        plot_forecast(stock_data, fila['forecast'], ticker, int(fila['d']))
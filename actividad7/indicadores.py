@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Medias móviles e indicadores en streaming (ventanas deslizantes con actualización incremental)."""
+
+import numpy as np
+import pandas as pd
+
+from .perfil import instrumentar
+
+# Medias móviles
+def moving_average(data, window):
+    return data.rolling(window=window).mean()
+
+# Indicadores móviles incrementales para varios tickers y ventanas a la vez.
+# Cada barra nueva cuesta O(1) por ventana: se guarda un buffer circular con las últimas barras y,
+# por ventana, el conteo de valores válidos, la media y la suma de cuadrados de desvíos (Welford),
+# que se actualizan con el valor que entra y el que sale. Con min_periods = ventana, igual que
+# data.rolling(window).mean() / .std(). Los cruces valen +1 cuando la media corta pasa por encima
+# de la larga, -1 cuando pasa por debajo y 0 en otro caso. El histórico se carga de una vez con
+# extender (vectorizado); actualizar es para las barras que llegan en vivo.
+class IndicadoresMoviles:
+    def __init__(self, tickers, windows=(9, 30)):
+        self.tickers = list(tickers)
+        self.windows = sorted(windows)
+        n = len(self.tickers)
+        self._buffer = np.full((max(self.windows), n), np.nan)
+        self._pos = 0
+        self._barras = 0
+        self._count = {w: np.zeros(n) for w in self.windows}
+        self._mean = {w: np.zeros(n) for w in self.windows}
+        self._ssqdm = {w: np.zeros(n) for w in self.windows}
+        self._pares = [(a, b) for i, a in enumerate(self.windows) for b in self.windows[i + 1:]]
+        # Signo de (media corta - media larga) tras la última barra y tras la anterior
+        self._signo = {par: np.full(n, np.nan) for par in self._pares}
+        self._signo_previo = {par: np.full(n, np.nan) for par in self._pares}
+
+    def _agregar(self, w, x):
+        ok = ~np.isnan(x)
+        count = self._count[w] + ok
+        delta = np.where(ok, x - self._mean[w], 0.0)
+        self._mean[w] += np.where(ok, delta / np.maximum(count, 1), 0.0)
+        self._ssqdm[w] += np.where(ok, (count - 1) * delta ** 2 / np.maximum(count, 1), 0.0)
+        self._count[w] = count
+
+    def _quitar(self, w, x):
+        ok = ~np.isnan(x)
+        count = self._count[w] - ok
+        delta = np.where(ok, x - self._mean[w], 0.0)
+        vacio = count == 0
+        self._mean[w] = np.where(vacio, 0.0, self._mean[w] - np.where(ok, delta / np.maximum(count, 1), 0.0))
+        self._ssqdm[w] = np.where(vacio, 0.0, self._ssqdm[w] - np.where(ok, (count + 1) * delta ** 2 / np.maximum(count, 1), 0.0))
+        self._count[w] = count
+
+    # Agrega una barra (un precio por ticker, en el orden de self.tickers) y devuelve los indicadores
+    def actualizar(self, precios):
+        x = np.asarray(precios, dtype=np.float64)
+        largo = len(self._buffer)
+        for w in self.windows:
+            if self._barras >= w:
+                self._quitar(w, self._buffer[(self._pos - w) % largo])
+            self._agregar(w, x)
+        self._buffer[self._pos] = x
+        self._pos = (self._pos + 1) % largo
+        self._barras += 1
+        self._signo_previo = self._signo
+        self._signo = {(a, b): np.sign(self._media(a) - self._media(b)) for a, b in self._pares}
+        return self.valores()
+
+    def _media(self, w):
+        return np.where(self._count[w] == w, self._mean[w], np.nan)
+
+    # Indicadores tras la última barra; no cambia el estado, así que se puede consultar las veces que
+    # haga falta
+    def valores(self):
+        out = {}
+        for w in self.windows:
+            completo = self._count[w] == w
+            out[f'ma_{w}'] = self._media(w)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                var = np.maximum(self._ssqdm[w], 0.0) / (self._count[w] - 1)
+            out[f'std_{w}'] = np.where(completo & (w > 1), np.sqrt(var), np.nan)
+        for a, b in self._pares:
+            signo, previo = self._signo[(a, b)], self._signo_previo[(a, b)]
+            out[f'cruce_{a}_{b}'] = np.where((signo != 0) & (previo != 0) & (signo != previo)
+                                             & ~np.isnan(signo) & ~np.isnan(previo), signo, 0.0)
+        return out
+
+    # Agrega varias barras (DataFrame fechas x tickers) y devuelve un DataFrame con columnas
+    # (indicador, ticker). Vectorizado en el tiempo: rolling sobre la matriz completa, precedida de
+    # las barras que ya estaban en el buffer; al final el estado de streaming (buffer, conteos,
+    # medias, sumas de cuadrados y signos) se recalcula desde la última ventana, así que actualizar
+    # sigue barra a barra desde ahí.
+    def extender(self, panel):
+        panel = panel[self.tickers]
+        nuevos = panel.to_numpy(dtype=np.float64)
+        if not len(nuevos):
+            return pd.DataFrame()
+        largo = len(self._buffer)
+        previos = min(self._barras, largo)
+        orden = (self._pos - previos + np.arange(previos)) % largo  # barras del buffer, de la más vieja
+        valores = np.vstack([self._buffer[orden], nuevos])
+        matriz = pd.DataFrame(valores)
+
+        out = {}
+        for w in self.windows:
+            ventanas = matriz.rolling(w, min_periods=w)
+            out[f'ma_{w}'] = ventanas.mean().to_numpy()[previos:]
+            out[f'std_{w}'] = ventanas.std().to_numpy()[previos:] if w > 1 else np.full_like(nuevos, np.nan)
+        signos = {}
+        for a, b in self._pares:
+            signo = np.sign(out[f'ma_{a}'] - out[f'ma_{b}'])
+            previo = np.vstack([self._signo[(a, b)][None, :], signo[:-1]])
+            out[f'cruce_{a}_{b}'] = np.where((signo != 0) & (previo != 0) & (signo != previo)
+                                             & ~np.isnan(signo) & ~np.isnan(previo), signo, 0.0)
+            signos[(a, b)] = (previo[-1], signo[-1])
+
+        # Estado de streaming desde la última ventana
+        ultimas = valores[-largo:]
+        self._buffer[:] = np.nan
+        self._buffer[largo - len(ultimas):] = ultimas
+        self._pos = 0
+        self._barras += len(nuevos)
+        for w in self.windows:
+            ventana = valores[-w:]
+            validos = ~np.isnan(ventana)
+            count = validos.sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = np.where(count > 0, np.nansum(ventana, axis=0) / count, 0.0)
+            self._count[w] = count.astype(np.float64)
+            self._mean[w] = mean
+            self._ssqdm[w] = np.where(validos, (ventana - mean) ** 2, 0.0).sum(axis=0)
+        self._signo_previo = {par: previo for par, (previo, _) in signos.items()}
+        self._signo = {par: signo for par, (_, signo) in signos.items()}
+
+        return pd.concat({nombre: pd.DataFrame(v, index=panel.index, columns=self.tickers) for nombre, v in out.items()},
+                         axis=1)
+
+# Backfill en una pasada sobre todo el panel; devuelve también el motor para seguir en streaming
+@instrumentar()
+def indicadores_panel(panel, windows=(9, 30)):
+    motor = IndicadoresMoviles(panel.columns, windows)
+    return motor.extender(panel), motor
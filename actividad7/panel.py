@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""Panel de precios compacto: una matriz (fechas x tickers, float32 o float64), opcionalmente
+mapeada desde disco, con el índice de fechas y el mapa ticker -> columna compartidos.
+
+La matriz se guarda en orden Fortran, así que la serie de cada ticker es un bloque contiguo: las
+vistas por ticker, por par y por subconjunto de tickers equiespaciados no copian datos. El panel
+expone lo que el resto del paquete usa de un DataFrame (`columns`, `index`, `panel[ticker]`,
+`panel[lista]`, `to_numpy`), de modo que las funciones de análisis lo aceptan tal cual.
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+
+# Slice equivalente a una lista de columnas en progresión aritmética (None si no lo es)
+def _como_slice(columnas):
+    if len(columnas) == 0:
+        return slice(0, 0)
+    if len(columnas) == 1:
+        return slice(columnas[0], columnas[0] + 1)
+    paso = columnas[1] - columnas[0]
+    if paso == 0 or np.any(np.diff(columnas) != paso):
+        return None
+    fin = columnas[-1] + paso
+    return slice(columnas[0], fin if fin >= 0 else None, paso)
+
+
+# Campo de precio del DataFrame OHLCV ancho de fetch_data: cierre ajustado si lo hay, si no cierre
+def campo_precio(data):
+    return 'Adj Close' if 'Adj Close' in data.columns.get_level_values(0) else 'Close'
+
+
+class PanelPrecios:
+    # `valores` es la matriz completa (n_fechas x n_columnas); `columnas` selecciona las de
+    # `tickers` (por defecto todas, en orden). `ruta` es el archivo del que se mapeó, si lo hay.
+    def __init__(self, valores, fechas, tickers, columnas=None, ruta=None):
+        self._valores = valores
+        self.index = pd.DatetimeIndex(fechas)
+        self.columns = pd.Index(list(tickers))
+        self._columnas = np.arange(len(self.columns)) if columnas is None else np.asarray(columnas, dtype=np.intp)
+        self._posicion = dict(zip(self.columns, self._columnas.tolist()))
+        self.ruta = ruta
+
+    # Panel a partir de un DataFrame ancho (fechas x tickers), columna a columna para no
+    # materializar copias intermedias del frame completo. Con `ruta` la matriz se escribe en
+    # <ruta>.npy (más <ruta>.json con fechas y tickers) y el panel queda mapeado desde el archivo.
+    @classmethod
+    def desde_frame(cls, frame, dtype=np.float64, ruta=None):
+        valores = cls._reservar((len(frame.index), len(frame.columns)), dtype, ruta)
+        for j in range(valores.shape[1]):
+            valores[:, j] = frame.iloc[:, j].to_numpy(dtype=dtype)
+        return cls._completar(valores, frame.index, frame.columns, ruta)
+
+    # Matriz vacía en orden Fortran: en memoria o, con `ruta`, en <ruta>.npy
+    @staticmethod
+    def _reservar(forma, dtype, ruta=None):
+        if ruta is None:
+            return np.empty(forma, dtype=dtype, order='F')
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        return np.lib.format.open_memmap(ruta + '.npy', mode='w+', dtype=dtype, shape=forma, fortran_order=True)
+
+    # Panel sobre la matriz ya llena de _reservar (mapeado desde el archivo si tiene `ruta`)
+    @classmethod
+    def _completar(cls, valores, fechas, tickers, ruta=None):
+        if ruta is None:
+            return cls(valores, fechas, tickers)
+        valores.flush()
+        del valores
+        cls._guardar_metadatos(ruta, fechas, tickers)
+        return cls.abrir(ruta)
+
+    # Precios de cierre ajustados (o de cierre) del DataFrame OHLCV ancho de fetch_data
+    @classmethod
+    def desde_descarga(cls, data, campo=None, dtype=np.float64, ruta=None):
+        return cls.desde_frame(data[campo or campo_precio(data)], dtype=dtype, ruta=ruta)
+
+    # Mapea un panel guardado; modo 'r' (solo lectura), 'r+' o 'c' (copia al escribir)
+    @classmethod
+    def abrir(cls, ruta, modo='r'):
+        with open(ruta + '.json', encoding='utf-8') as f:
+            meta = json.load(f)
+        valores = np.load(ruta + '.npy', mmap_mode=modo)
+        return cls(valores, pd.to_datetime(meta['fechas']), meta['tickers'], ruta=ruta)
+
+    @staticmethod
+    def _guardar_metadatos(ruta, fechas, tickers):
+        with open(ruta + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'fechas': [str(fecha) for fecha in fechas], 'tickers': [str(t) for t in tickers]}, f)
+
+    # Escribe el panel en <ruta>.npy/.json y devuelve el panel mapeado desde ahí
+    def guardar(self, ruta, dtype=None):
+        return PanelPrecios.desde_frame(self.to_frame(), dtype=dtype or self.dtype, ruta=ruta)
+
+    @property
+    def dtype(self):
+        return self._valores.dtype
+
+    @property
+    def shape(self):
+        return len(self.index), len(self.columns)
+
+    @property
+    def nbytes(self):
+        return self.shape[0] * self.shape[1] * self.dtype.itemsize
+
+    @property
+    def empty(self):
+        return 0 in self.shape
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, ticker):
+        return ticker in self._posicion
+
+    def __repr__(self):
+        origen = f", ruta={self.ruta!r}" if self.ruta else ''
+        return f"PanelPrecios({self.shape[0]} fechas x {self.shape[1]} tickers, {self.dtype}{origen})"
+
+    # Vista 1-D (sin copia) de la serie de un ticker
+    def columna(self, ticker):
+        return self._valores[:, self._posicion[ticker]]
+
+    # panel['LLY'] -> Series sobre la vista de la columna; panel[['LLY', 'JPM']] -> sub-panel que
+    # comparte la matriz
+    def __getitem__(self, clave):
+        if isinstance(clave, str):
+            if clave not in self._posicion:
+                raise KeyError(clave)
+            return pd.Series(self.columna(clave), index=self.index, name=clave, copy=False)
+        tickers = list(clave)
+        faltantes = [t for t in tickers if t not in self._posicion]
+        if faltantes:
+            raise KeyError(faltantes)
+        return PanelPrecios(self._valores, self.index, tickers, [self._posicion[t] for t in tickers], self.ruta)
+
+    # Matriz fechas x tickers del panel: vista si las columnas son equiespaciadas (p. ej. un par o
+    # el panel completo) y el dtype coincide; copia en otro caso
+    def to_numpy(self, dtype=None):
+        corte = _como_slice(self._columnas)
+        valores = self._valores[:, corte] if corte is not None else self._valores[:, self._columnas]
+        return valores if dtype is None else valores.astype(dtype, copy=False)
+
+    # Vista (n_fechas x 2) de un par de tickers
+    def par(self, ticker1, ticker2):
+        return self[[ticker1, ticker2]].to_numpy()
+
+    # Filas sin NaN en ningún ticker; sin huecos es la misma vista que to_numpy
+    def filas_completas(self, dtype=None):
+        valores = self.to_numpy(dtype)
+        incompletas = np.zeros(len(valores), dtype=bool)
+        for j in range(valores.shape[1]):
+            incompletas |= np.isnan(valores[:, j])
+        return valores[~incompletas] if incompletas.any() else valores
+
+    def to_frame(self):
+        return pd.DataFrame(self.to_numpy(), index=self.index, columns=self.columns, copy=False)
+
+    # Al enviarse a otro proceso, un panel mapeado viaja como (ruta, tickers) y se vuelve a mapear
+    def __reduce_ex__(self, protocolo):
+        if self.ruta is None:
+            return super().__reduce_ex__(protocolo)
+        return (_reabrir, (self.ruta, list(self.columns)))
+
+
+def _reabrir(ruta, tickers):
+    return PanelPrecios.abrir(ruta)[tickers]
+
+
+# Construcción de un panel ticker a ticker, sin el DataFrame OHLCV de todo el universo: de cada
+# ticker se guarda solo su serie de precios (campo `campo`, por defecto el cierre ajustado o el de
+# cierre, en `dtype`) y sus fechas, compartidas con los tickers que tienen las mismas. panel() reserva
+# la matriz con la unión de fechas y copia cada serie en su columna, liberándola al copiarla.
+class ConstructorPanel:
+    def __init__(self, campo=None, dtype=np.float64):
+        self.campo = campo
+        self.dtype = np.dtype(dtype)
+        self._series = {}  # ticker -> (valores, clave de sus fechas)
+        self._fechas = {}  # (largo, primera, última) -> [arrays de fechas distintos con esa clave]
+
+    def __len__(self):
+        return len(self._series)
+
+    def __contains__(self, ticker):
+        return ticker in self._series
+
+    def _indice(self, fechas):
+        clave = (len(fechas), fechas[0], fechas[-1]) if len(fechas) else (0,)
+        candidatas = self._fechas.setdefault(clave, [])
+        for i, conocidas in enumerate(candidatas):
+            if np.array_equal(conocidas, fechas):
+                return clave, i
+        candidatas.append(fechas)
+        return clave, len(candidatas) - 1
+
+    # Agrega (o reemplaza) la serie de un ticker a partir de su DataFrame OHLCV
+    def agregar(self, ticker, df):
+        campo = self.campo or campo_precio(df)
+        valores = df[campo].to_numpy(dtype=self.dtype) if campo in df.columns else np.full(len(df), np.nan, self.dtype)
+        self._series[ticker] = (valores, self._indice(df.index.to_numpy()))
+
+    # PanelPrecios con los tickers agregados (ordenados por nombre, como las columnas de fetch_data);
+    # con `ruta`, mapeado desde <ruta>.npy/.json como en desde_frame
+    def panel(self, ruta=None):
+        tickers = sorted(self._series)
+        distintas = [f for candidatas in self._fechas.values() for f in candidatas]
+        if len(distintas) == 1:
+            fechas = distintas[0]
+        else:
+            fechas = np.unique(np.concatenate(distintas)) if distintas else np.array([], dtype='datetime64[ns]')
+        valores = PanelPrecios._reservar((len(fechas), len(tickers)), self.dtype, ruta)
+        for j, ticker in enumerate(tickers):
+            serie, (clave, i) = self._series.pop(ticker)
+            propias = self._fechas[clave][i]
+            if propias is fechas:
+                valores[:, j] = serie
+            else:
+                valores[:, j] = np.nan
+                valores[np.searchsorted(fechas, propias), j] = serie
+        self._fechas.clear()
+        return PanelPrecios._completar(valores, pd.DatetimeIndex(fechas, name='Date'), tickers, ruta)
+
+
+
+# Filas sin NaN de un DataFrame o un PanelPrecios como matriz; en un panel sin huecos es una vista
+def valores_completos(datos, dtype=np.float64):
+    if isinstance(datos, PanelPrecios):
+        return datos.filas_completas(dtype)
+    return datos.dropna().to_numpy(dtype=dtype)
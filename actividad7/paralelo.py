@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Pools de procesos con el panel de precios en memoria compartida."""
+
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from .panel import PanelPrecios
+
+# Panel de precios compartido por los procesos del pool (se adjunta una vez por proceso)
+_panel_worker = None
+_shm_worker = None
+
+def _init_worker(nombre_shm, shape, index, columns):
+    global _panel_worker, _shm_worker
+    _shm_worker = shared_memory.SharedMemory(name=nombre_shm)
+    valores = np.ndarray(shape, dtype=np.float64, buffer=_shm_worker.buf)
+    _panel_worker = pd.DataFrame(valores, index=index, columns=columns, copy=False)
+
+# Un PanelPrecios mapeado desde disco llega como (ruta, tickers) y cada worker lo vuelve a mapear
+def _init_worker_panel(panel):
+    global _panel_worker
+    _panel_worker = panel
+
+# Panel adjuntado por _init_worker (solo dentro de los procesos del pool)
+def panel_worker():
+    return _panel_worker
+
+# Pool de procesos cuyos workers ven el panel en memoria compartida (copiado una sola vez).
+# Un PanelPrecios mapeado desde disco no se copia: los workers mapean el mismo archivo.
+@contextmanager
+def _pool_con_panel(panel, n_workers=None):
+    if isinstance(panel, PanelPrecios) and panel.ruta is not None:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker_panel, initargs=(panel,)) as executor:
+            yield executor
+        return
+    valores = panel.to_numpy(dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(valores.nbytes, 1))
+    try:
+        np.ndarray(valores.shape, dtype=np.float64, buffer=shm.buf)[:] = valores
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(shm.name, valores.shape, panel.index, list(panel.columns))) as executor:
+            yield executor
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Perfilado por etapa: tiempos, memoria pico y métricas de cada función instrumentada."""
+
+import os
+import time
+import inspect
+import functools
+import threading
+import tracemalloc
+
+# Perfilado por etapa (ACTIVIDAD7_PERFIL=1; ACTIVIDAD7_PERFIL=memoria mide también la memoria pico
+# con tracemalloc, que es más caro). Las funciones de cada etapa llevan @instrumentar: con el
+# perfilado apagado la envoltura solo comprueba un booleano y llama a la función original.
+# Se registran tiempo de pared, tiempo de CPU, memoria pico, métricas propias de la etapa (p.ej.
+# iteraciones del optimizador) y el ticker en curso. Lo que corre dentro de los pools de procesos
+# no se registra por separado: cuenta dentro de la etapa que lanzó el pool.
+PERFIL = os.environ.get('ACTIVIDAD7_PERFIL', '')
+_perfil_activo = bool(PERFIL)
+_perfil_memoria = PERFIL == 'memoria'
+_spans = []
+_hilo = threading.local()  # pila de spans abiertos de cada hilo (la descarga masiva usa varios)
+_ticker_actual = None
+_t0_perfil = time.perf_counter()
+
+def activar_perfilado(memoria=False):
+    global _perfil_activo, _perfil_memoria
+    _perfil_activo, _perfil_memoria = True, memoria
+    if memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def desactivar_perfilado():
+    global _perfil_activo
+    _perfil_activo = False
+
+def perfilado_activo():
+    return _perfil_activo
+
+# Ticker al que se atribuyen las etapas que no reciben un argumento `ticker`
+def perfil_ticker(ticker):
+    global _ticker_actual
+    _ticker_actual = ticker
+
+def instrumentar(nombre=None, metricas=None):
+    def decorador(func):
+        etapa = nombre or func.__name__
+        parametros = list(inspect.signature(func).parameters)
+        pos_ticker = parametros.index('ticker') if 'ticker' in parametros else None
+
+        @functools.wraps(func)
+        def envoltura(*args, **kwargs):
+            if not _perfil_activo:
+                return func(*args, **kwargs)
+            if 'ticker' in kwargs:
+                ticker = kwargs['ticker']
+            elif pos_ticker is not None and len(args) > pos_ticker:
+                ticker = args[pos_ticker]
+            else:
+                ticker = _ticker_actual
+            return _medir_etapa(etapa, ticker, metricas, func, args, kwargs)
+        return envoltura
+    return decorador
+
+def _medir_etapa(etapa, ticker, metricas, func, args, kwargs):
+    pila_spans = _hilo.__dict__.setdefault('pila', [])
+    span = {'name': etapa, 'ticker': ticker, 'depth': len(pila_spans), 'pid': os.getpid(),
+            'tid': threading.get_ident()}
+    memoria = _perfil_memoria and tracemalloc.is_tracing()
+    if memoria:
+        # El pico global se reinicia en cada etapa; el de la etapa padre se conserva en su span
+        actual, pico = tracemalloc.get_traced_memory()
+        if pila_spans:
+            pila_spans[-1]['_pico'] = max(pila_spans[-1]['_pico'], pico)
+        tracemalloc.reset_peak()
+        span['_inicio_mem'], span['_pico'] = actual, actual
+    pila_spans.append(span)
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    try:
+        resultado = func(*args, **kwargs)
+    except Exception as e:
+        span['error'] = repr(e)
+        raise
+    else:
+        if metricas is not None:
+            try:
+                span.update(metricas(resultado))
+            except Exception:
+                pass
+        return resultado
+    finally:
+        span['inicio_s'] = inicio - _t0_perfil
+        span['wall_s'] = time.perf_counter() - inicio
+        span['cpu_s'] = time.process_time() - inicio_cpu
+        pila_spans.pop()
+        if memoria:
+            pico = max(span.pop('_pico'), tracemalloc.get_traced_memory()[1])
+            span['peak_mem_mb'] = (pico - span.pop('_inicio_mem')) / 2 ** 20
+            if pila_spans:
+                pila_spans[-1]['_pico'] = max(pila_spans[-1]['_pico'], pico)
+        _spans.append(span)
+
+# Tabla resumen por etapa, o tiempo de pared por ticker x etapa con por_ticker=True
+def resumen_perfil(por_ticker=False):
+    import pandas as pd
+    spans = pd.DataFrame(_spans)
+    if spans.empty:
+        return spans
+    if por_ticker:
+        return spans.dropna(subset=['ticker']).pivot_table(index='ticker', columns='name', values='wall_s', aggfunc='sum')
+    agregados = {'llamadas': ('wall_s', 'size'), 'wall_total_s': ('wall_s', 'sum'), 'wall_medio_s': ('wall_s', 'mean'),
+                 'wall_max_s': ('wall_s', 'max'), 'cpu_total_s': ('cpu_s', 'sum')}
+    if 'peak_mem_mb' in spans:
+        agregados['peak_mem_max_mb'] = ('peak_mem_mb', 'max')
+    if 'iteraciones' in spans:
+        agregados['iteraciones_total'] = ('iteraciones', 'sum')
+    return spans.groupby('name').agg(**agregados).sort_values('wall_total_s', ascending=False)
+
+# Traza en JSON (lista de spans) y en formato Chrome trace (chrome://tracing, Perfetto)
+def exportar_perfil(output_dir=None):
+    from .salidas import guardar_resultado
+    eventos = [{'name': span['name'], 'cat': 'actividad7', 'ph': 'X', 'ts': span['inicio_s'] * 1e6,
+                'dur': span['wall_s'] * 1e6, 'pid': span['pid'], 'tid': span['tid'],
+                'args': {k: v for k, v in span.items() if k not in ('name', 'pid', 'tid', 'inicio_s', 'wall_s')}}
+               for span in _spans]
+    return (guardar_resultado('perfil', {'spans': _spans, 'resumen': resumen_perfil().reset_index().to_dict('records')}, output_dir),
+            guardar_resultado('perfil_chrome_trace', {'traceEvents': eventos, 'displayTimeUnit': 'ms'}, output_dir))
+
+if _perfil_memoria:
+    tracemalloc.start()
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""Flujo completo del análisis con selección de etapas.
+
+Cada etapa importa sus módulos al ejecutarse, así que un trabajo de solo ADF o solo cointegración
+no carga matplotlib ni el modelo ARIMA.
+"""
+
+import sys
+
+from . import salidas
+from .perfil import perfil_ticker, perfilado_activo, exportar_perfil, resumen_perfil
+
+# Etapas en orden de ejecución; 'backtest' es opcional (no entra en las etapas por defecto)
+ETAPAS = ('adf', 'random_walk', 'correlograma', 'medias_moviles', 'arima', 'backtest', 'johansen', 'pares')
+ETAPAS_POR_DEFECTO = tuple(e for e in ETAPAS if e != 'backtest')
+_POR_TICKER = {'adf', 'random_walk', 'correlograma', 'medias_moviles', 'arima'}
+_CON_ADF = {'adf', 'correlograma', 'arima'}
+_CON_FIGURAS = {'random_walk', 'correlograma', 'medias_moviles', 'arima'}
+
+
+# ADF en lote de cada grupo de tickers según llega de la descarga, mientras se descarga el resto.
+# Devuelve el callback para fetch_data y el diccionario {ticker: (huella, resultados)} que va llenando.
+def _adf_al_llegar(precision):
+    from .estacionariedad import adf_lote, huella_adf
+    from .panel import campo_precio
+    calculados = {}
+
+    def al_llegar(lote):
+        precios = lote[campo_precio(lote)].astype(precision, copy=False)
+        for ticker, resultados in adf_lote(precios).items():
+            calculados[ticker] = (huella_adf(precios[ticker]), resultados)
+    return al_llegar, calculados
+
+
+# ADF de `tickers` sobre el panel completo: se reutilizan los del lote si la serie del ticker no
+# cambió al unir los lotes (puede cambiar si otros lotes aportan fechas en las que no cotiza)
+def _adf_panel(data, tickers, calculados):
+    from .estacionariedad import adf_lote, huella_adf
+    adf_resultados = {t: calculados[t][1] for t in tickers if t in calculados
+                      and calculados[t][0] == huella_adf(data[t])}
+    faltantes = [t for t in tickers if t not in adf_resultados]
+    if faltantes:
+        adf_resultados.update(adf_lote(data[faltantes]))
+    return {t: adf_resultados[t] for t in tickers}
+
+
+# Análisis por acción en modo interactivo: resultados impresos y figuras en pantalla
+def _analisis_interactivo(data, tickers, etapas, orden_automatico, adf_resultados):
+    from .estacionariedad import adf_test, make_stationary
+
+    graficos = None
+    if etapas & {'random_walk', 'correlograma', 'medias_moviles'}:
+        from . import graficos
+
+    # Correlogramas de todo el panel, diferenciado con el d de cada ticker, en una pasada (las
+    # figuras solo los dibujan)
+    correlogramas = None
+    if 'correlograma' in etapas:
+        from .estacionariedad import orden_diferenciacion
+        from .correlograma import correlograma_lote, correlograma_ticker
+        correlogramas = correlograma_lote(data[tickers], d={t: orden_diferenciacion(adf_resultados[t]) for t in tickers})
+
+    # Medias móviles de 9 y 30 días, desviaciones y cruces de todo el panel en una pasada
+    indicadores = None
+    if 'medias_moviles' in etapas:
+        from .indicadores import indicadores_panel
+        indicadores, _ = indicadores_panel(data[tickers], windows=(9, 30))
+
+    aic_scores = {}
+    for ticker in tickers:
+        print(f'\n\n=== Análisis para {ticker} ===\n')
+        perfil_ticker(ticker)
+
+        stock_data = data[ticker]
+
+        # ADF test original
+        if 'adf' in etapas:
+            adf_test(stock_data, title=f'{ticker} - Serie original', result=adf_resultados[ticker].get(0))
+
+        # Simulación de caminata aleatoria
+        if 'random_walk' in etapas:
+            graficos.plot_random_walk(stock_data, ticker)
+
+        if adf_resultados:
+            # Volver estacionaria la serie
+            stationary_series, d = make_stationary(stock_data, verbose='adf' in etapas,
+                                                   adf_results=adf_resultados[ticker])
+
+            # ADF de serie estacionaria
+            if 'adf' in etapas:
+                adf_test(stationary_series, title=f'{ticker} - Serie diferenciada',
+                         result=adf_resultados[ticker].get(d))
+
+            # Correlograma y orden ARMA sugerido por sus cortes
+            if correlogramas is not None:
+                correlograma = correlograma_ticker(correlogramas, ticker)
+                ljung_box = correlograma['lb_pvalue']
+                print(f"Orden sugerido por el correlograma: ARMA({correlograma['p']}, {correlograma['q']})"
+                      + (f"; Ljung-Box(10) p-value: {ljung_box[10]:.4f}" if len(ljung_box) > 10 else ''))
+                graficos.plot_correlogram(stationary_series, title=f'{ticker} - Serie estacionaria (d={d})',
+                                          correlograma=correlograma)
+
+        # Medias móviles (calculadas en una sola pasada para todo el panel)
+        if indicadores is not None:
+            graficos.plot_moving_averages(stock_data, ticker, indicadores['ma_9'][ticker], indicadores['ma_30'][ticker])
+
+        # Ajustar ARIMA
+        if 'arima' in etapas:
+            from .arima import fit_arima
+            aic_scores[ticker] = fit_arima(stock_data, ticker, order=(1, d, 1), auto=orden_automatico)
+    perfil_ticker(None)
+    return aic_scores
+
+
+# Análisis por acción estructurado (modo paralelo o batch): una tabla con una fila por ticker (None si
+# ninguna etapa pedida la produce) y las figuras de las etapas pedidas (en pantalla o, en modo batch,
+# a archivo si GUARDAR_FIGURAS)
+def _analisis_estructurado(data, tickers, etapas, n_workers, orden_automatico, adf_resultados):
+    tabla, aic_scores = None, {}
+    if 'arima' in etapas:
+        from .analisis import analisis_paralelo, guardar_resultados_analisis
+        tabla = analisis_paralelo(data, tickers, n_workers=n_workers, auto_orden=orden_automatico,
+                                  adf_results=adf_resultados)
+        aic_scores = tabla['aic'].to_dict()
+        if salidas.HEADLESS:
+            guardar_resultados_analisis(tabla)
+        else:
+            print(tabla.drop(columns=['forecast', 'params', 'pvalues']).to_string())
+    elif etapas & _CON_ADF:
+        # Sin ARIMA basta con el ADF en lote
+        from .estacionariedad import tabla_adf
+        tabla = tabla_adf(adf_resultados)
+        if salidas.HEADLESS:
+            salidas.guardar_resultado('adf', tabla)
+        else:
+            print(tabla.to_string())
+
+    correlogramas = _correlogramas(data, tickers, tabla['d']) if 'correlograma' in etapas else None
+    if salidas.graficar() and etapas & _CON_FIGURAS:
+        from .graficos import graficar_ticker
+        from .correlograma import correlograma_ticker
+        for ticker in tickers:
+            perfil_ticker(ticker)
+            graficar_ticker(data[ticker], ticker, tabla.loc[ticker] if tabla is not None else None,
+                            correlograma_ticker(correlogramas, ticker) if correlogramas is not None else None,
+                            etapas=etapas)
+        perfil_ticker(None)
+    return tabla, aic_scores
+
+
+# Correlogramas de todo el panel con el d de cada ticker: resumen por ticker ((p, q) sugeridos y
+# Ljung-Box) y, en modo batch, también los valores por rezago
+def _correlogramas(data, tickers, d):
+    from .correlograma import correlograma_lote, tabla_correlograma, tabla_rezagos
+    correlogramas = correlograma_lote(data[tickers], d=d.fillna(0).astype(int).to_dict())
+    tabla = tabla_correlograma(correlogramas)
+    if salidas.HEADLESS:
+        salidas.guardar_resultado('correlograma', tabla)
+        salidas.guardar_resultado('correlograma_rezagos', tabla_rezagos(correlogramas))
+    else:
+        print(tabla.to_string())
+    return correlogramas
+
+
+# Ejecuta las etapas pedidas sobre los precios ajustados de `tickers` y devuelve los resultados
+# estructurados que se hayan calculado ({'data', 'analisis', 'aic_scores', 'backtest', 'johansen',
+# 'pares'}). `fuente` y `cache_dir` se pasan a fetch_data; None = Yahoo Finance con la caché local.
+# `opciones_descarga` son los parámetros de la descarga masiva (tamano_lote, max_concurrencia,
+# max_por_segundo, backoff, retries); el ADF de cada lote se calcula en cuanto llega.
+# Los precios se guardan en un PanelPrecios de `precision` ('float64' o 'float32'); con `ruta_panel`
+# la matriz se escribe a disco y se mapea, y los pools de procesos la comparten sin copiarla.
+def ejecutar(tickers, start_date, end_date, etapas=None, fuente=None, cache_dir=None, modo_paralelo=False,
+             n_workers=None, orden_automatico=True, precision='float64', ruta_panel=None, opciones_descarga=None):
+    etapas = set(ETAPAS_POR_DEFECTO if etapas is None else etapas)
+    desconocidas = etapas - set(ETAPAS)
+    if desconocidas:
+        raise ValueError(f"Etapas desconocidas: {', '.join(sorted(desconocidas))}")
+    tickers = list(tickers)
+
+    al_llegar, adf_calculados = _adf_al_llegar(precision) if etapas & _CON_ADF else (None, {})
+    # Precios ajustados en un panel compacto, llenado ticker a ticker según llegan (sin armar el
+    # DataFrame OHLCV de todo el universo)
+    from .datos import fetch_panel, CACHE_DIR
+    data = fetch_panel(tickers, start_date, end_date, cache_dir=cache_dir or CACHE_DIR, source=fuente,
+                       al_llegar=al_llegar, dtype=precision, ruta=ruta_panel, **(opciones_descarga or {}))
+    if data is None or data.empty:
+        print("Failed to retrieve data. Please check network or try later.")
+        return None
+    salida = {'data': data}
+    # Los tickers sin datos (fetch_data ya los reportó) quedan fuera del análisis
+    tickers = [t for t in tickers if t in data]
+
+    # Análisis por acción; en modo batch siempre va por la ruta estructurada
+    aic_scores = {}
+    if etapas & _POR_TICKER:
+        adf_resultados = _adf_panel(data, tickers, adf_calculados) if etapas & _CON_ADF else {}
+        if modo_paralelo or salidas.HEADLESS:
+            salida['analisis'], aic_scores = _analisis_estructurado(data, tickers, etapas, n_workers, orden_automatico,
+                                                                    adf_resultados)
+        else:
+            aic_scores = _analisis_interactivo(data, tickers, etapas, orden_automatico, adf_resultados)
+    salida['aic_scores'] = aic_scores
+
+    # Backtest walk-forward de los pronósticos ARIMA (RMSE/MAE por ticker)
+    if 'backtest' in etapas:
+        from .analisis import backtest_panel
+        analisis = salida.get('analisis')
+        orders = analisis['order'].to_dict() if analisis is not None and 'order' in analisis else None
+        backtest = backtest_panel(data, tickers, orders=orders, n_workers=n_workers)
+        salida['backtest'] = backtest
+        if salidas.HEADLESS:
+            salidas.guardar_resultado('backtest', backtest.astype({'order': str}))
+        else:
+            print("\n=== Backtest walk-forward ARIMA ===")
+            print(backtest.to_string())
+
+    # Test de cointegración de Johansen sobre todas las series
+    if 'johansen' in etapas:
+        from .cointegracion import johansen_resultado, cointegration_test
+        coint_df = data[tickers]
+        if salidas.HEADLESS:
+            salida['johansen'] = johansen_resultado(coint_df)
+            salidas.guardar_resultado('johansen', salida['johansen'])
+        else:
+            cointegration_test(coint_df)
+
+    # Comparación final
+    if aic_scores:
+        best_stock = min(aic_scores, key=aic_scores.get)
+        if salidas.HEADLESS:
+            salidas.guardar_resultado('recomendacion', {'aic_scores': aic_scores, 'best_stock': best_stock})
+        else:
+            print("\n=== Comparación de inversiones ===")
+            print("AIC menor = mejor ajuste del modelo ARIMA.\n")
+            for ticker, aic in aic_scores.items():
+                print(f"{ticker} → AIC: {aic:.2f}")
+            print(f"\n✔ Recomendación basada en ARIMA: {best_stock}")
+            print("Nota: Si hay cointegración, considera estrategia de 'pairs trading'.")
+
+    # Screen all pairs: cheap correlation / Engle-Granger filters first, Johansen only on the survivors
+    if 'pares' in etapas:
+        from .cointegracion import cointegration_screen
+        pairs_table = cointegration_screen(data, tickers, n_workers=n_workers)
+        salida['pares'] = pairs_table
+        if salidas.HEADLESS:
+            salidas.guardar_resultado('pairs_cointegration', pairs_table)
+        elif pairs_table.empty:
+            print("\n=== Pairwise Cointegration Screen ===")
+            print("No pair passed the correlation / Engle-Granger screen.")
+        else:
+            print("\n=== Pairwise Cointegration Screen ===")
+            print(pairs_table.to_string())
+
+    # Esperar a que terminen de escribirse las figuras en segundo plano (modo batch)
+    graficos = sys.modules.get(f'{__package__}.graficos')
+    if graficos is not None:
+        graficos.esperar_figuras()
+
+    # Perfil por etapa: JSON + Chrome trace y la tabla resumen
+    if perfilado_activo():
+        perfil_ticker(None)
+        exportar_perfil()
+        if not salidas.HEADLESS:
+            print("\n=== Profile by stage ===")
+            print(resumen_perfil().to_string())
+    return salida
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Modo de salida: interactivo o batch (headless), figuras y artefactos JSON/Parquet."""
+
+import os
+import sys
+import json
+import numpy as np
+
+# Modo batch sin interfaz (ACTIVIDAD7_HEADLESS=1): backend no interactivo, figuras guardadas a
+# archivo en segundo plano (ACTIVIDAD7_FIGURAS=0 para no generarlas) y resultados como JSON/Parquet
+HEADLESS = os.environ.get('ACTIVIDAD7_HEADLESS') == '1'
+GUARDAR_FIGURAS = os.environ.get('ACTIVIDAD7_FIGURAS', '1') == '1'
+OUTPUT_DIR = os.environ.get('ACTIVIDAD7_OUTPUT', 'resultados')
+
+# Cambiar el modo de salida sin variables de entorno (CLI, notebooks). Conviene llamarla antes de la
+# primera figura: si matplotlib ya estaba importado se pasa a Agg al activar el modo batch.
+def configurar(headless=None, figuras=None, output_dir=None):
+    global HEADLESS, GUARDAR_FIGURAS, OUTPUT_DIR
+    if headless is not None:
+        HEADLESS = headless
+    if figuras is not None:
+        GUARDAR_FIGURAS = figuras
+    if output_dir is not None:
+        OUTPUT_DIR = output_dir
+    if HEADLESS and 'matplotlib' in sys.modules:
+        import matplotlib.pyplot as plt
+        plt.switch_backend('Agg')
+
+def graficar():
+    return not HEADLESS or GUARDAR_FIGURAS
+
+# Artefactos del modo batch: DataFrames a Parquet, el resto a JSON. JSON no tiene NaN ni infinitos:
+# se escriben como null
+def _finitos(obj):
+    if isinstance(obj, dict):
+        return {k: _finitos(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finitos(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return _finitos(obj.tolist())
+    if isinstance(obj, (float, np.floating)) and not np.isfinite(obj):
+        return None
+    return obj
+
+def _a_json(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
+
+def guardar_resultado(nombre, obj, output_dir=None):
+    import pandas as pd
+    output_dir = output_dir or OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    if isinstance(obj, pd.DataFrame):
+        ruta = os.path.join(output_dir, nombre + '.parquet')
+        obj.to_parquet(ruta)
+    else:
+        ruta = os.path.join(output_dir, nombre + '.json')
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(_finitos(obj), f, indent=2, ensure_ascii=False, default=_a_json)
+    return ruta
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Simulación Monte Carlo de caminatas aleatorias."""
+
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from .perfil import instrumentar
+
+# Monte Carlo de caminatas aleatorias: 'rw' (sin drift), 'drift' o 'gbm' (log-precios).
+# Sin horizonte simula desde el primer precio sobre las fechas históricas (para comparar con la
+# serie real); con horizonte=h proyecta h días hábiles desde el último precio.
+# Los caminos se avanzan por tramos de tiempo que caben en max_memoria_mb, así que nunca existe la
+# matriz completa caminos x días: de cada tramo solo se guardan los percentiles por fecha y el
+# estado final. Cada bloque de caminos tiene su propio Generator (SeedSequence.spawn) y los números
+# se sacan en orden temporal, de modo que el resultado no depende del tamaño de los tramos.
+@instrumentar()
+def simular_caminatas(stock_data, n_paths=10000, modelo='rw', horizonte=None, seed=42,
+                      percentiles=(5, 25, 50, 75, 95), bloque_paths=100_000, max_memoria_mb=256):
+    precios = stock_data.dropna()
+    log = modelo == 'gbm'
+    incrementos = (np.log(precios) if log else precios).diff().dropna()
+    mu = incrementos.mean() if modelo in ('drift', 'gbm') else 0.0
+    sigma = incrementos.std()
+
+    if horizonte is None:
+        inicial, n_steps, fechas = precios.iloc[0], len(precios), precios.index
+    else:
+        inicial, n_steps = precios.iloc[-1], horizonte
+        fechas = pd.date_range(start=precios.index[-1], periods=horizonte + 1, freq='B')[1:]
+
+    semilla = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    tamanos = [min(bloque_paths, n_paths - i) for i in range(0, n_paths, bloque_paths)]
+    generadores = [np.random.default_rng(s) for s in semilla.spawn(len(tamanos))]
+
+    # Tramo de tiempo: la matriz del tramo y la copia que ordena np.percentile
+    tramo = max(1, int(max_memoria_mb * 2 ** 20 // (3 * 8 * n_paths)))
+    estado = np.full(n_paths, np.log(inicial) if log else inicial, dtype=np.float64)
+    bandas = np.empty((n_steps, len(percentiles)))
+    t = 0
+    while t < n_steps:
+        k = min(tramo, n_steps - t)
+        pasos = np.empty((k, n_paths))
+        inicio = 0
+        for generador, n in zip(generadores, tamanos):
+            pasos[:, inicio:inicio + n] = generador.normal(mu, sigma, size=(k, n))
+            inicio += n
+        np.cumsum(pasos, axis=0, out=pasos)
+        pasos += estado
+        estado = pasos[-1].copy()
+        if log:
+            np.exp(pasos, out=pasos)
+        bandas[t:t + k] = np.percentile(pasos, percentiles, axis=1).T
+        t += k
+
+    terminal = np.exp(estado) if log else estado
+    return {
+        'bandas': pd.DataFrame(bandas, index=fechas, columns=[f'p{q}' for q in percentiles]),
+        'terminal': terminal,
+        'terminal_percentiles': {f'p{q}': float(v) for q, v in zip(percentiles, np.percentile(terminal, percentiles))},
+        'mu': mu,
+        'sigma': sigma,
+    }
+
+# Monte Carlo de todo el panel repartido en procesos. Cada ticker recibe su propia SeedSequence
+# (hija de `seed`), así que los resultados no dependen del número de workers.
+@instrumentar()
+def montecarlo_panel(data, tickers, n_workers=None, seed=42, **kwargs):
+    semillas = np.random.SeedSequence(seed).spawn(len(tickers))
+    series = [data[ticker] for ticker in tickers]
+    if n_workers == 1:
+        resultados = [simular_caminatas(s, seed=sem, **kwargs) for s, sem in zip(series, semillas)]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futuros = [executor.submit(simular_caminatas, s, seed=sem, **kwargs) for s, sem in zip(series, semillas)]
+            resultados = [f.result() for f in futuros]
+    return dict(zip(tickers, resultados))
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks de las etapas de Actividad7 sobre paneles sintéticos.
+
+Genera paneles deterministas (caminatas aleatorias con drift y pares cointegrados) de varios
+tamaños, mide tiempo de pared, tiempo de CPU y memoria pico de cada etapa y escribe los
+resultados en JSON para compararlos entre versiones:
+
+    python benchmarks/bench_pipeline.py --sizes 10x250,50x500 --output base.json
+    python benchmarks/bench_pipeline.py --sizes 10x250,50x500 --compare base.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+warnings.filterwarnings('ignore')
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+# Paquete actividad7 en modo batch sin figuras y sin caché de resultados (cada repetición debe
+# calcular de verdad); las etapas usan sus exportaciones perezosas
+def cargar_etapas():
+    if str(RAIZ) not in sys.path:
+        sys.path.insert(0, str(RAIZ))
+    import actividad7
+    actividad7.configurar(headless=True, figuras=False)
+    actividad7.configurar_cache(activa=False)
+    return actividad7
+
+
+# Panel sintético determinista: n_tickers precios diarios de n_days días hábiles. Los primeros
+# 2 * n_pares tickers forman pares cointegrados (B = a + h * A + ruido AR(1) estacionario) y el
+# resto son caminatas aleatorias geométricas con drift.
+def panel_sintetico(n_tickers, n_days, n_pares=None, seed=0):
+    rng = np.random.default_rng(seed)
+    n_pares = min(n_tickers // 2, max(1, n_tickers // 10)) if n_pares is None else n_pares
+    fechas = pd.bdate_range('2015-01-01', periods=n_days, name='Date')
+    retornos = rng.normal(rng.normal(2e-4, 2e-4, n_tickers), rng.uniform(0.01, 0.03, n_tickers), (n_days, n_tickers))
+    precios = rng.uniform(20, 300, n_tickers) * np.exp(np.cumsum(retornos, axis=0))
+    for k in range(n_pares):
+        a, b = 2 * k, 2 * k + 1
+        ruido = np.zeros(n_days)
+        choques = rng.normal(0, 0.02 * precios[0, a], n_days)
+        for t in range(1, n_days):
+            ruido[t] = 0.8 * ruido[t - 1] + choques[t]
+        precios[:, b] = rng.uniform(5, 20) + rng.uniform(0.5, 2.0) * precios[:, a] + ruido
+    return pd.DataFrame(precios, index=fechas, columns=[f'SYN{i:04d}' for i in range(n_tickers)])
+
+
+# Etapas: cada una recibe el módulo, el panel y el número de workers
+def _etapas():
+    def make_stationary(m, panel, workers):
+        for ticker in panel.columns:
+            m.adf_test(panel[ticker], verbose=False)
+            serie, d = m.make_stationary(panel[ticker], verbose=False)
+            m.adf_test(serie, verbose=False)
+
+    def adf_lote(m, panel, workers):
+        m.adf_lote(panel)
+
+    def moving_average(m, panel, workers):
+        for ticker in panel.columns:
+            m.moving_average(panel[ticker], 9)
+            m.moving_average(panel[ticker], 30)
+
+    def indicadores_panel(m, panel, workers):
+        m.indicadores_panel(panel, windows=(9, 30))
+
+    def fit_arima(m, panel, workers):
+        for ticker in panel.columns:
+            m.fit_arima(panel[ticker], ticker, order=(1, 1, 1))
+
+    def analisis_paralelo(m, panel, workers):
+        m.analisis_paralelo(panel, list(panel.columns), n_workers=workers)
+
+    def cointegration_test(m, panel, workers):
+        # Las tablas de Johansen cubren hasta 12 series
+        m.cointegration_test(panel[list(panel.columns[:10])])
+
+    def pairwise_cointegration_test(m, panel, workers):
+        m.pairwise_cointegration_test(panel, list(panel.columns))
+
+    def cointegration_screen(m, panel, workers):
+        m.cointegration_screen(panel, list(panel.columns), n_workers=workers)
+
+    def random_walk(m, panel, workers):
+        m.montecarlo_panel(panel, list(panel.columns), n_workers=workers, n_paths=1000)
+
+    return {f.__name__: f for f in (make_stationary, adf_lote, moving_average, indicadores_panel, fit_arima,
+                                    analisis_paralelo, cointegration_test, pairwise_cointegration_test,
+                                    cointegration_screen, random_walk)}
+
+
+ETAPAS = _etapas()
+
+
+# Tiempo de pared y de CPU (mejor de `repeat`) y memoria pico de Python/NumPy con tracemalloc.
+# La memoria se mide en una corrida aparte para que el rastreo no infle los tiempos.
+def medir(funcion, repeat=3):
+    paredes, cpus = [], []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0, c0 = time.perf_counter(), time.process_time()
+            funcion()
+            paredes.append(time.perf_counter() - t0)
+            cpus.append(time.process_time() - c0)
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'wall_s': min(paredes), 'cpu_s': min(cpus), 'peak_mem_mb': pico / 2 ** 20}
+
+
+def _metadatos():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    import statsmodels
+    return {'commit': commit or None, 'python': platform.python_version(), 'numpy': np.__version__,
+            'pandas': pd.__version__, 'statsmodels': statsmodels.__version__, 'machine': platform.machine(),
+            'cpu_count': os.cpu_count(), 'fecha': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+# formato: 'frame' (DataFrame), 'panel' (PanelPrecios en memoria) o 'mmap' (PanelPrecios mapeado
+# desde un archivo temporal)
+def correr(tamanos, etapas, repeat=3, workers=1, seed=0, formato='frame'):
+    m = cargar_etapas()
+    filas = []
+    carpeta = tempfile.TemporaryDirectory() if formato == 'mmap' else None
+    for n_tickers, n_days in tamanos:
+        panel = panel_sintetico(n_tickers, n_days, seed=seed)
+        if formato != 'frame':
+            ruta = os.path.join(carpeta.name, f'{n_tickers}x{n_days}') if carpeta else None
+            panel = m.PanelPrecios.desde_frame(panel, ruta=ruta)
+        for nombre in etapas:
+            resultado = medir(lambda: ETAPAS[nombre](m, panel, workers), repeat=repeat)
+            fila = {'stage': nombre, 'n_tickers': n_tickers, 'n_days': n_days, 'workers': workers, 'panel': formato,
+                    **resultado}
+            filas.append(fila)
+            print(f"{nombre:<28} {n_tickers:>6}x{n_days:<6} wall {resultado['wall_s']:9.4f}s  "
+                  f"cpu {resultado['cpu_s']:9.4f}s  peak {resultado['peak_mem_mb']:9.1f} MB", flush=True)
+    if carpeta is not None:
+        carpeta.cleanup()
+    return {'metadata': _metadatos(), 'results': filas}
+
+
+# Compara con una corrida anterior; devuelve las filas cuyo tiempo empeora más que `umbral`
+def comparar(actual, base, umbral=0.2):
+    clave = lambda f: (f['stage'], f['n_tickers'], f['n_days'], f.get('workers', 1), f.get('panel', 'frame'))
+    previos = {clave(f): f for f in base['results']}
+    regresiones = []
+    for fila in actual['results']:
+        previo = previos.get(clave(fila))
+        if previo is None or previo['wall_s'] <= 0:
+            continue
+        ratio = fila['wall_s'] / previo['wall_s']
+        marca = 'REGRESIÓN' if ratio > 1 + umbral else ''
+        print(f"{fila['stage']:<28} {fila['n_tickers']:>6}x{fila['n_days']:<6} "
+              f"{previo['wall_s']:9.4f}s -> {fila['wall_s']:9.4f}s  x{ratio:5.2f} {marca}")
+        if marca:
+            regresiones.append({**fila, 'baseline_wall_s': previo['wall_s'], 'ratio': ratio})
+    return regresiones
+
+
+def _tamanos(texto):
+    return [tuple(int(v) for v in t.lower().split('x')) for t in texto.split(',') if t]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de las etapas de Actividad7 sobre paneles sintéticos')
+    parser.add_argument('--sizes', default='10x250,50x500,100x1000', help='tamaños N_TICKERSxN_DIAS separados por comas')
+    parser.add_argument('--stages', default=','.join(ETAPAS), help='etapas a medir, separadas por comas')
+    parser.add_argument('--repeat', type=int, default=3, help='repeticiones de tiempo (se reporta la mejor)')
+    parser.add_argument('--workers', type=int, default=1, help='workers para las etapas con pool de procesos')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--panel', choices=['frame', 'panel', 'mmap'], default='frame',
+                        help='tipo de panel que reciben las etapas: DataFrame, PanelPrecios o PanelPrecios mapeado')
+    parser.add_argument('--output', default='bench_results.json', help='archivo JSON de resultados')
+    parser.add_argument('--compare', help='JSON de una corrida anterior para detectar regresiones')
+    parser.add_argument('--threshold', type=float, default=0.2, help='empeoramiento relativo tolerado')
+    args = parser.parse_args(argv)
+
+    etapas = [e for e in args.stages.split(',') if e]
+    desconocidas = set(etapas) - set(ETAPAS)
+    if desconocidas:
+        parser.error(f"etapas desconocidas: {', '.join(sorted(desconocidas))}")
+
+    resultados = correr(_tamanos(args.sizes), etapas, repeat=args.repeat, workers=args.workers, seed=args.seed,
+                        formato=args.panel)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2)
+    print(f"\nResultados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            base = json.load(f)
+        print(f"\nComparación con {args.compare}:")
+        regresiones = comparar(resultados, base, args.threshold)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresión(es) por encima del {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Johansen con más series de las que tienen valores críticos tabulados."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from actividad7 import salidas
+from actividad7.cointegracion import MAX_SERIES_JOHANSEN, cointegration_test, johansen_resultado
+
+
+def _panel(n_series):
+    rng = np.random.default_rng(0)
+    comun = np.cumsum(rng.normal(size=300))
+    return pd.DataFrame({f'T{i}': comun + rng.normal(size=300) for i in range(n_series)},
+                        index=pd.bdate_range('2020-01-01', periods=300))
+
+
+def _rechazar(constante):
+    raise AssertionError(f'JSON inválido: {constante}')
+
+
+@pytest.mark.filterwarnings('ignore::statsmodels.tools.sm_exceptions.HypothesisTestWarning')
+def test_rango_sin_valores_criticos_queda_en_none(tmp_path):
+    resultado = johansen_resultado(_panel(MAX_SERIES_JOHANSEN + 1))
+    assert resultado['cointegration_rank_95'] is None and 'message' in resultado
+    ruta = salidas.guardar_resultado('johansen', resultado, output_dir=tmp_path)
+    with open(ruta) as f:
+        guardado = json.load(f, parse_constant=_rechazar)
+    assert guardado['cointegration_rank_95'] is None
+    assert guardado['critical_values_trace'][0] == [None, None, None]
+    assert guardado['trace_statistic'][0] == resultado['trace_statistic'][0]
+
+
+def test_rango_con_valores_criticos():
+    resultado = johansen_resultado(_panel(3))
+    assert resultado['cointegration_rank_95'] == 2 and 'message' not in resultado
+
+
+def test_interactivo_avisa_en_lugar_de_interpretar(capsys):
+    cointegration_test(_panel(MAX_SERIES_JOHANSEN + 1))
+    salida = capsys.readouterr().out
+    assert 'skipped' in salida and 'No cointegration' not in salida
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Descarga incremental: los huecos se empalman con la caché salvo que la fuente haya reajustado la historia."""
+
+import numpy as np
+import pandas as pd
+
+from actividad7.datos import fetch_data, leer_cache
+
+FECHAS = pd.bdate_range('2024-01-01', '2024-06-28')
+
+
+def _ohlcv(cierre):
+    return pd.DataFrame({'Open': cierre, 'High': cierre + 1, 'Low': cierre - 1, 'Close': cierre,
+                         'Volume': np.full(len(cierre), 1_000)}, index=FECHAS.rename('Date'))
+
+
+# Fuente en memoria: `historia[ticker]` es lo que la fuente contesta hoy; registra cada pedido
+class _Fuente:
+    def __init__(self, historia):
+        self.historia = historia
+        self.pedidos = []
+
+    def __call__(self, tickers, start, end):
+        self.pedidos.append((tuple(tickers), start, end))
+        return {t: df.loc[(df.index >= start) & (df.index < end)] for t, df in self.historia.items() if t in tickers}
+
+
+def _fetch(fuente, tmp_path, start, end):
+    return fetch_data(['AAA', 'BBB'], start, end, cache_dir=tmp_path, source=fuente, backoff=0)
+
+
+def test_hueco_se_empalma_si_la_historia_no_cambio(tmp_path):
+    rng = np.random.default_rng(0)
+    historia = {t: _ohlcv(100 + np.cumsum(rng.normal(size=len(FECHAS)))) for t in ['AAA', 'BBB']}
+    fuente = _Fuente(historia)
+    _fetch(fuente, tmp_path, '2024-01-01', '2024-04-01')
+    fuente.pedidos.clear()
+    data = _fetch(fuente, tmp_path, '2024-01-01', '2024-07-01')
+    # Un solo pedido: el hueco nuevo con unos días de solape con lo guardado
+    assert len(fuente.pedidos) == 1 and fuente.pedidos[0][1] < '2024-04-01'
+    pd.testing.assert_frame_equal(data['Close'], pd.DataFrame({t: historia[t]['Close'] for t in historia}),
+                                  check_names=False, check_freq=False)
+
+
+def test_historia_reajustada_se_vuelve_a_pedir_completa(tmp_path):
+    rng = np.random.default_rng(1)
+    historia = {t: _ohlcv(100 + np.cumsum(rng.normal(size=len(FECHAS)))) for t in ['AAA', 'BBB']}
+    fuente = _Fuente(historia)
+    _fetch(fuente, tmp_path, '2024-01-01', '2024-04-01')
+
+    # Dividendo de AAA después de la primera descarga: toda su historia anterior baja un 2%
+    reajustada = historia['AAA'].copy()
+    reajustada.loc[:'2024-05-15', ['Open', 'High', 'Low', 'Close']] *= 0.98
+    historia['AAA'] = reajustada
+    fuente.pedidos.clear()
+    data = _fetch(fuente, tmp_path, '2024-01-01', '2024-07-01')
+
+    assert [p[0] for p in fuente.pedidos] == [('AAA', 'BBB'), ('AAA',)]
+    assert fuente.pedidos[1][1:] == ('2024-01-01', '2024-07-01')
+    pd.testing.assert_series_equal(data['Close']['AAA'], reajustada['Close'], check_names=False, check_freq=False)
+    df, rango = leer_cache('AAA', tmp_path)
+    pd.testing.assert_frame_equal(df, reajustada, check_freq=False)
+    assert rango[0] == pd.Timestamp('2024-01-01')
+    pd.testing.assert_series_equal(data['Close']['BBB'], historia['BBB']['Close'], check_names=False,
+                                   check_freq=False)
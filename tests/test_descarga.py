@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Descarga masiva contra un servidor HTTP local: reintentos, límite de tasa y resultados parciales."""
+
+import io
+import time
+import threading
+import http.server
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from actividad7.descarga import DescargaMasiva, fuente_http
+from actividad7.datos import fetch_data, leer_cache
+
+FECHAS = pd.bdate_range('2024-01-01', '2024-03-29')
+TICKERS = ['AAA', 'BBB', 'CCC', 'DDD', 'EEE', 'FFF']
+
+
+def _csv(ticker):
+    rng = np.random.default_rng(sum(map(ord, ticker)))
+    cierre = 100 + np.cumsum(rng.normal(size=len(FECHAS)))
+    df = pd.DataFrame({'Open': cierre, 'High': cierre + 1, 'Low': cierre - 1, 'Close': cierre,
+                       'Volume': rng.integers(1_000, 10_000, len(FECHAS))}, index=FECHAS.rename('Date'))
+    return df.to_csv().encode()
+
+
+# Servidor de CSV por ticker en un puerto libre. `fallos[ticker]` es cuántas peticiones de ese ticker
+# responden 503 antes de servirlo; los tickers sin CSV responden 404. Registra cada petición.
+class _Servidor(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Manejador)
+        self.csv = {t: _csv(t) for t in TICKERS}
+        self.fallos = {}
+        self.peticiones = []  # (instante, ticker)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def conteo(self, ticker):
+        return sum(1 for _, t in self.peticiones if t == ticker)
+
+
+class _Manejador(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        ticker = self.path.split('?')[0].strip('/').removesuffix('.csv')
+        servidor = self.server
+        with servidor.lock:
+            servidor.peticiones.append((time.monotonic(), ticker))
+            fallar = servidor.fallos.get(ticker, 0) > 0
+            if fallar:
+                servidor.fallos[ticker] -= 1
+        if fallar or ticker not in servidor.csv:
+            self.send_response(503 if fallar else 404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        cuerpo = servidor.csv[ticker]
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+@pytest.fixture
+def servidor():
+    srv = _Servidor()
+    hilo = threading.Thread(target=srv.serve_forever, daemon=True)
+    hilo.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    hilo.join()
+
+
+def _descargar(servidor, tickers, start='2024-01-01', end='2024-04-01', **opciones):
+    opciones = {'tamano_lote': 2, 'max_concurrencia': 3, 'backoff': 0, **opciones}
+    descarga = DescargaMasiva(fuente_http(servidor.url, timeout=5), tickers, start, end, **opciones)
+    recibidos = {}
+    for nuevos in descarga:
+        assert not set(nuevos) & set(recibidos)  # cada ticker se entrega una sola vez
+        recibidos.update(nuevos)
+    return descarga, recibidos
+
+
+def test_solo_se_reintentan_los_que_fallan(servidor):
+    servidor.fallos = {'BBB': 1, 'EEE': 2}
+    descarga, recibidos = _descargar(servidor, TICKERS, intentos=3)
+    assert set(recibidos) == set(TICKERS)
+    assert descarga.fallidos == [] and descarga.errores == {}
+    assert {t: servidor.conteo(t) for t in TICKERS} == {'AAA': 1, 'BBB': 2, 'CCC': 1, 'DDD': 1, 'EEE': 3, 'FFF': 1}
+    esperado = pd.read_csv(io.BytesIO(servidor.csv['EEE']), index_col=0, parse_dates=True)
+    pd.testing.assert_frame_equal(recibidos['EEE'], esperado, check_freq=False)
+
+
+def test_agotados_quedan_en_fallidos_y_el_resto_se_entrega(servidor):
+    servidor.fallos = {'CCC': 10}
+    descarga, recibidos = _descargar(servidor, TICKERS + ['ZZZ'], intentos=2)
+    assert set(recibidos) == set(TICKERS) - {'CCC'}
+    assert sorted(descarga.fallidos) == ['CCC', 'ZZZ']
+    assert set(descarga.errores) == {'CCC', 'ZZZ'}
+    assert servidor.conteo('CCC') == 2 and servidor.conteo('ZZZ') == 2
+
+
+def test_rango_sin_filas_no_es_un_fallo(servidor):
+    # 2024-01-06 y 2024-01-07 son sábado y domingo
+    descarga, recibidos = _descargar(servidor, ['AAA', 'BBB'], start='2024-01-06', end='2024-01-08')
+    assert descarga.fallidos == []
+    assert set(recibidos) == {'AAA', 'BBB'} and all(df.empty for df in recibidos.values())
+    assert servidor.conteo('AAA') == 1 and servidor.conteo('BBB') == 1
+
+
+def test_limite_de_tasa_espacia_las_peticiones(servidor):
+    por_segundo = 20
+    descarga, recibidos = _descargar(servidor, TICKERS, tamano_lote=1, max_concurrencia=6,
+                                     max_por_segundo=por_segundo)
+    assert set(recibidos) == set(TICKERS)
+    instantes = sorted(t for t, _ in servidor.peticiones)
+    # Seis turnos de 1/20 s: la última petición sale al menos 5/20 s después de la primera
+    assert instantes[-1] - instantes[0] >= 0.9 * (len(TICKERS) - 1) / por_segundo
+
+
+def test_fetch_data_devuelve_lo_obtenido_y_no_cubre_los_fallidos(servidor, tmp_path):
+    servidor.fallos = {'DDD': 10}
+    fuente = fuente_http(servidor.url, timeout=5)
+    data = fetch_data(TICKERS, '2024-01-01', '2024-04-01', retries=2, cache_dir=tmp_path, source=fuente,
+                      tamano_lote=2, backoff=0)
+    assert set(data.columns.get_level_values('Ticker')) == set(TICKERS) - {'DDD'}
+    assert leer_cache('DDD', tmp_path) == (None, None)
+    assert leer_cache('AAA', tmp_path)[1] == (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-04-01'))
+
+    # En la corrida siguiente solo se vuelve a pedir el que falló
+    servidor.fallos.clear()
+    servidor.peticiones.clear()
+    data = fetch_data(TICKERS, '2024-01-01', '2024-04-01', retries=2, cache_dir=tmp_path, source=fuente,
+                      tamano_lote=2, backoff=0)
+    assert set(data.columns.get_level_values('Ticker')) == set(TICKERS)
+    assert [t for _, t in servidor.peticiones] == ['DDD']
+
+
+def test_no_existe_falla_sin_reintentos(tmp_path):
+    from actividad7.datos import fuente_local
+    (tmp_path / 'AAA.csv').write_bytes(_csv('AAA'))
+    pedidos = []
+    local = fuente_local(tmp_path)
+
+    def fuente(tickers, start, end):
+        pedidos.append(list(tickers))
+        return local(tickers, start, end)
+
+    inicio = time.monotonic()
+    descarga = DescargaMasiva(fuente, ['AAA', 'ZZZ'], '2024-01-01', '2024-04-01', intentos=3, backoff=5)
+    recibidos = {t: df for nuevos in descarga for t, df in nuevos.items()}
+    assert set(recibidos) == {'AAA'} and len(recibidos['AAA']) == len(FECHAS)
+    assert descarga.fallidos == ['ZZZ'] and descarga.errores == {'ZZZ': 'no existe en la fuente'}
+    assert pedidos == [['AAA', 'ZZZ']] and time.monotonic() - inicio < 1
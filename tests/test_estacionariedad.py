@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""ADF en lote frente a statsmodels.adfuller, orden de diferenciación por orden de diferenciación."""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.stattools import adfuller
+
+from actividad7 import estacionariedad
+from actividad7.estacionariedad import adf_lote, orden_diferenciacion
+
+
+# Panel con caminatas aleatorias (no estacionarias), ruido estacionario, una serie I(2), huecos
+# intermedios, un ticker que empieza tarde, uno corto y uno constante
+def _panel(n_dias=600, seed=0):
+    rng = np.random.default_rng(seed)
+    fechas = pd.bdate_range('2020-01-01', periods=n_dias)
+    columnas = {f'RW{i}': 100 + np.cumsum(rng.normal(size=n_dias)) for i in range(5)}
+    columnas.update({f'RUIDO{i}': rng.normal(size=n_dias) for i in range(3)})
+    columnas['I2'] = np.cumsum(np.cumsum(rng.normal(size=n_dias)))
+    panel = pd.DataFrame(columnas, index=fechas)
+    panel['HUECOS'] = panel['RW0'] + rng.normal(size=n_dias)
+    panel.iloc[[50, 51, 300], panel.columns.get_loc('HUECOS')] = np.nan
+    panel['TARDE'] = panel['RW1'] * 1.5
+    panel.iloc[:250, panel.columns.get_loc('TARDE')] = np.nan
+    panel['CORTO'] = np.nan
+    panel.iloc[-40:, panel.columns.get_loc('CORTO')] = 50 + np.cumsum(rng.normal(size=40))
+    panel['CONSTANTE'] = 10.0
+    return panel
+
+
+def _referencia(serie, d):
+    for _ in range(d):
+        serie = serie.diff()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)  # aviso del formato de retorno de adfuller
+        return adfuller(serie.dropna().to_numpy(), autolag='AIC')
+
+
+def _comparar(panel, resultados):
+    for ticker in panel.columns:
+        for d, res in resultados[ticker].items():
+            ref = _referencia(panel[ticker], d)
+            np.testing.assert_allclose(res[0], ref[0], rtol=1e-9, err_msg=f'{ticker} d={d} estadístico')
+            np.testing.assert_allclose(res[1], ref[1], rtol=1e-9, atol=1e-12, err_msg=f'{ticker} d={d} p-valor')
+            assert (res[2], res[3]) == (ref[2], ref[3]), f'{ticker} d={d} rezagos/nobs'
+            assert res[4] == pytest.approx(ref[4], rel=1e-12), f'{ticker} d={d} valores críticos'
+            np.testing.assert_allclose(res[5], ref[5], rtol=1e-9, err_msg=f'{ticker} d={d} icbest')
+
+
+@pytest.fixture(autouse=True)
+def sin_cache():
+    from actividad7.cache_resultados import cache_activa, configurar_cache
+    activa = cache_activa()
+    configurar_cache(activa=False)
+    yield
+    configurar_cache(activa=activa)
+
+
+def test_adf_lote_coincide_con_adfuller_en_cada_orden():
+    panel = _panel()
+    resultados = adf_lote(panel, max_diff=2)
+    _comparar(panel, resultados)
+    # Se prueban los órdenes hasta el primero estacionario, como make_stationary
+    assert set(resultados['RUIDO0']) == {0}
+    assert set(resultados['RW0']) == {0, 1}
+    assert orden_diferenciacion(resultados['I2']) == 2
+    assert resultados['CONSTANTE'] == {}
+
+
+def test_adf_lote_en_bloques_da_lo_mismo(monkeypatch):
+    panel = _panel(seed=1)
+    completo = adf_lote(panel)
+    # Presupuesto mínimo: una serie por bloque
+    monkeypatch.setattr(estacionariedad, '_MB_POR_BLOQUE', 0)
+    por_bloques = adf_lote(panel)
+    assert por_bloques == completo
+    _comparar(panel, por_bloques)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Indicadores móviles: el backfill vectorizado y el streaming barra a barra dan lo mismo."""
+
+import numpy as np
+import pandas as pd
+
+from actividad7.indicadores import IndicadoresMoviles, indicadores_panel
+
+
+def _panel():
+    rng = np.random.default_rng(0)
+    panel = pd.DataFrame(100 + np.cumsum(rng.normal(size=(400, 4)), axis=0), columns=['A', 'B', 'C', 'D'],
+                         index=pd.bdate_range('2020-01-01', periods=400))
+    panel.iloc[50:55, 1] = np.nan  # hueco
+    panel.iloc[:80, 2] = np.nan  # empieza tarde
+    panel.iloc[200, 3] = np.nan
+    return panel
+
+
+def _streaming(panel):
+    motor = IndicadoresMoviles(panel.columns)
+    filas = [motor.actualizar(fila) for fila in panel.to_numpy()]
+    return pd.concat({nombre: pd.DataFrame(np.vstack([f[nombre] for f in filas]), index=panel.index,
+                                           columns=panel.columns)
+                      for nombre in filas[0]}, axis=1)
+
+
+def test_backfill_igual_a_rolling_y_a_streaming():
+    panel = _panel()
+    tabla, _ = indicadores_panel(panel)
+    esperado = _streaming(panel)
+    assert list(tabla.columns) == list(esperado.columns)
+    np.testing.assert_allclose(tabla.to_numpy(), esperado.to_numpy(), atol=1e-9)
+    np.testing.assert_allclose(tabla['ma_30'].to_numpy(), panel.rolling(30).mean().to_numpy(), atol=1e-9)
+    np.testing.assert_allclose(tabla['std_9'].to_numpy(), panel.rolling(9).std().to_numpy(), atol=1e-9)
+    assert tabla['cruce_9_30'].abs().to_numpy().sum() > 0
+
+
+def test_streaming_sigue_desde_el_backfill():
+    panel = _panel()
+    esperado = _streaming(panel)
+    motor = IndicadoresMoviles(panel.columns)
+    partes = [motor.extender(panel.iloc[:5]), motor.extender(panel.iloc[5:250])]
+    for i, fila in enumerate(panel.iloc[250:320].to_numpy(), start=250):
+        valores = motor.actualizar(fila)
+        for nombre, v in valores.items():
+            np.testing.assert_allclose(v, esperado[nombre].iloc[i].to_numpy(), atol=1e-9, err_msg=f'{nombre} {i}')
+    partes.append(motor.extender(panel.iloc[320:]))
+    tabla = pd.concat(partes)
+    np.testing.assert_allclose(tabla.to_numpy(), esperado.drop(index=panel.index[250:320]).to_numpy(), atol=1e-9)
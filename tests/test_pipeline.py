@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""Ruta estructurada del pipeline (--parallel) fuera del modo batch."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from actividad7 import graficos, salidas
+from actividad7.datos import fuente_local
+from actividad7.pipeline import ejecutar
+
+
+@pytest.fixture
+def fuente(tmp_path):
+    rng = np.random.default_rng(0)
+    fechas = pd.bdate_range('2024-01-01', '2024-03-29', name='Date')
+    for ticker in ['AAA', 'BBB']:
+        cierre = 100 + np.cumsum(rng.normal(size=len(fechas)))
+        pd.DataFrame({'Open': cierre, 'High': cierre + 1, 'Low': cierre - 1, 'Close': cierre,
+                      'Volume': 1_000}, index=fechas).to_csv(tmp_path / f'{ticker}.csv')
+    return fuente_local(tmp_path)
+
+
+@pytest.mark.parametrize('headless', [False, True])
+def test_etapas_solo_de_figuras_en_modo_paralelo(fuente, tmp_path, monkeypatch, headless):
+    monkeypatch.setattr(salidas, 'HEADLESS', headless)
+    monkeypatch.setattr(salidas, 'GUARDAR_FIGURAS', True)
+    dibujadas = []
+    monkeypatch.setattr(graficos, 'graficar_ticker',
+                        lambda datos, ticker, fila, correlograma=None, etapas=None: dibujadas.append((ticker, etapas)))
+    ejecutar(['AAA', 'BBB'], '2024-01-01', '2024-04-01', etapas=['medias_moviles', 'random_walk'], fuente=fuente,
+             cache_dir=tmp_path / 'cache', modo_paralelo=True)
+    assert [t for t, _ in dibujadas] == ['AAA', 'BBB']
+    assert all(etapas == {'medias_moviles', 'random_walk'} for _, etapas in dibujadas)